@@ -0,0 +1,74 @@
+from caching import LRUCache
+import threading
+import re
+import os
+
+ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', 512))
+# Cosine similarity above which a differently-worded question reuses a cached answer; unset disables it
+ANSWER_CACHE_SIMILARITY = float(os.getenv('ANSWER_CACHE_SIMILARITY')) if os.getenv('ANSWER_CACHE_SIMILARITY') else None
+
+
+def normalize_query(query):
+    return ' '.join(re.sub(r"[^\w\s]", ' ', query.lower()).split())
+
+
+class AnswerCache:
+    """
+    Caches LLM answers for calendar questions. An answer is only reusable for the same
+    matched documents (id + fingerprint) on the same day, so a changed event or a new
+    day always produces a fresh answer.
+    """
+
+    def __init__(self, max_size=ANSWER_CACHE_SIZE, similarity_threshold=ANSWER_CACHE_SIMILARITY):
+        self.similarity_threshold = similarity_threshold
+        self._entries = LRUCache(max_size)
+        self._lock = threading.Lock()
+        self.semantic_hits = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def context_key(search_results, today, limit=None):
+        ids = search_results['ids'][0][:limit] if search_results.get('ids') else []
+        metadatas = search_results['metadatas'][0][:limit] if search_results.get('metadatas') else [None] * len(ids)
+        return (tuple((doc_id, (metadata or {}).get('fp')) for doc_id, metadata in zip(ids, metadatas)), today)
+
+    def lookup(self, query, context_key, query_embedding=None):
+        entry = self._entries.get((normalize_query(query), context_key))
+        if entry is None and query_embedding is not None and self.similarity_threshold is not None:
+            entry = self._nearest(context_key, query_embedding)
+            if entry is not None:
+                self.semantic_hits += 1
+        if entry is None:
+            return None
+        with self._lock:
+            self.saved_seconds += entry['latency']
+        return entry['answer']
+
+    def _nearest(self, context_key, query_embedding):
+        best, best_score = None, self.similarity_threshold
+        for (_, entry_context), entry in self._entries.items():
+            if entry_context != context_key or entry['embedding'] is None:
+                continue
+            # Embeddings are L2-normalized, so the dot product is the cosine similarity
+            score = sum(a * b for a, b in zip(query_embedding, entry['embedding']))
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def store(self, query, context_key, answer, latency, query_embedding=None):
+        self._entries.put((normalize_query(query), context_key), {
+            'answer': answer,
+            'latency': latency,
+            'embedding': query_embedding
+        })
+
+    def stats(self):
+        stats = self._entries.stats()
+        # Semantic hits first register as exact-key misses, so count them as hits here
+        stats['hits'] += self.semantic_hits
+        stats['misses'] -= self.semantic_hits
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['semantic_hits'] = self.semantic_hits
+        stats['saved_seconds'] = round(self.saved_seconds, 3)
+        return stats
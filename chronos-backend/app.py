@@ -1,16 +1,27 @@
-from flask import Flask, jsonify, session, redirect, request, url_for, Response
-from flask_cors import CORS
+from startup import startup_profile
+
+with startup_profile.step('import flask'):
+    from flask import Flask, jsonify, session, redirect, request, url_for, Response, stream_with_context
+    from flask_cors import CORS
 import os
 import pytz
 import json
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+with startup_profile.step('import google.auth'):
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
 from datetime import datetime, timedelta
-from groq_engine import SchedulingAgent, EditOrDeleteIntentAgent, get_groq_welcome
-from search_engine import stringify_event, update_events_in_chroma, search_events
-from groq import Groq
+with startup_profile.step('import groq_engine'):
+    from groq_engine import SchedulingAgent, EditOrDeleteIntentAgent, get_groq_welcome, stream_groq_welcome
+with startup_profile.step('import search_engine'):
+    from search_engine import search_events, search_engine, begin_index_sync
+from answer_cache import AnswerCache
+from rules_cache import rules_cache
+from pipeline import PipelineContext
+from jobs import JobManager, QueueFull, JOB_EVENTS_KEEPALIVE_SECONDS
+from sessions import SessionRegistry, SessionTokens, DEFAULT_USER, SINGLE_USER_MODE, token_path, user_data_dir, user_id_for_account
+import llm_client
+from calendar_sync import CalendarSync
+from event_store import EventStore
 import json
 import os
 import threading
@@ -19,7 +30,10 @@ import time
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'  # Allow HTTP connections in development
 
 app = Flask(__name__)
-app.secret_key = 'thisisSECRET1340iu5203u5103'
+# Signs the session cookie; anyone who knows it can forge sessions, so it must come from the environment
+app.secret_key = os.getenv('FLASK_SECRET_KEY')
+if not app.secret_key:
+    raise RuntimeError("FLASK_SECRET_KEY is not set; set it to a long random value before starting the server")
 
 # Update CORS configuration
 CORS(app, 
@@ -48,37 +62,71 @@ SCOPES = [
 ]
 
 class CalendarAPI:
-    def __init__(self):
+    """One user's Google credentials, service clients, calendar mirror and scheduling agent."""
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
         self.auth_state = None
         self.creds = None
         self.service = None
         self.people_service = None
+        self.calendar_sync = None
+        self.scheduling_agent = None
+        self._agent_lock = threading.Lock()
+
+    @classmethod
+    def for_user(cls, user_id):
+        """Registry factory: restores the user's saved credentials, if any."""
+        calendar_api = cls(user_id)
+        calendar_api.load_credentials()
+        return calendar_api
+
+    def load_credentials(self) -> bool:
+        """Loads (and refreshes if needed) this user's saved token; True when the clients are ready."""
+        if self.user_id is None:
+            # Not signed in yet: there is no token of ours to load
+            return False
+        path = token_path(self.user_id)
+        if not os.path.exists(path):
+            return False
+        try:
+            self.creds = Credentials.from_authorized_user_file(path, SCOPES)
+            if self.creds.valid:
+                self.instantiate()
+                return True
+                
+            # If creds are expired but we have a refresh token
+            if self.creds and self.creds.expired and self.creds.refresh_token:
+                try:
+                    self.creds.refresh(Request())
+                    self.save_credentials()
+                    self.instantiate()
+                    return True
+                except Exception as e:
+                    print(f"Error refreshing token: {str(e)}")
+                    # Delete invalid token file
+                    os.remove(path)
+        except Exception as e:
+            print(f"Error loading credentials: {str(e)}")
+            # Delete invalid token file
+            os.remove(path)
+        return False
+
+    def save_credentials(self):
+        path = token_path(self.user_id)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as token:
+            token.write(self.creds.to_json())
 
     def login(self) -> str:
         # Check if we have valid credentials
-        if os.path.exists('token.json'):
-            try:
-                self.creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-                if self.creds.valid:
-                    self.instantiate()
-                    return ''
-                    
-                # If creds are expired but we have a refresh token
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    try:
-                        self.creds.refresh(Request())
-                        self.instantiate()
-                        return ''
-                    except Exception as e:
-                        print(f"Error refreshing token: {str(e)}")
-                        # Delete invalid token file
-                        os.remove('token.json')
-            except Exception as e:
-                print(f"Error loading credentials: {str(e)}")
-                # Delete invalid token file
-                os.remove('token.json')
+        if self.service is not None and self.creds and self.creds.valid:
+            return ''
+        if self.load_credentials():
+            return ''
 
         # Otherwise, need to get new credentials
+        from google_auth_oauthlib.flow import Flow
         flow = Flow.from_client_secrets_file('client_secret.json', SCOPES)
         flow.redirect_uri = url_for('callback', _external=True)
         auth_url, self.auth_state = flow.authorization_url(
@@ -87,50 +135,61 @@ class CalendarAPI:
         )
         return auth_url
 
-    def login_callback(self, auth_response):
+    def login_callback(self, auth_response, state=None):
+        from google_auth_oauthlib.flow import Flow
+        from googleapiclient.discovery import build
         flow = Flow.from_client_secrets_file(
             'client_secret.json',
             scopes=SCOPES,
-            state=self.auth_state
+            state=state or self.auth_state
         )
         flow.redirect_uri = url_for('callback', _external=True)
         
         flow.fetch_token(authorization_response=auth_response)
         self.creds = flow.credentials
+
+        service = build('calendar', 'v3', credentials=self.creds)
+        if self.user_id is None:
+            # The primary calendar's id is the account's address, which identifies the user
+            account = service.calendars().get(calendarId='primary').execute()['id']
+            self.user_id = user_id_for_account(account)
         
         # Save credentials for future use
-        with open('token.json', 'w') as token:
-            token.write(self.creds.to_json())
+        self.save_credentials()
             
-        self.instantiate()
+        self.instantiate(service)
 
-    def instantiate(self):
-        self.service = build('calendar', 'v3', credentials=self.creds)
+    def instantiate(self, service=None):
+        from googleapiclient.discovery import build
+        self.service = service or build('calendar', 'v3', credentials=self.creds)
         self.people_service = build('people', 'v1', credentials=self.creds)
+        self.calendar_sync = CalendarSync(
+            self.service, store=EventStore(os.path.join(user_data_dir(self.user_id), 'events.db'))
+        )
+        search_engine.tenant(self.user_id).event_store = self.calendar_sync.store
+
+    def get_scheduling_agent(self):
+        """This user's SchedulingAgent, built on first use."""
+        with self._agent_lock:
+            if self.scheduling_agent is None:
+                self.scheduling_agent = SchedulingAgent(self.service, self.people_service, self.calendar_sync)
+            return self.scheduling_agent
 
     def get_events(self):
         if not self.creds or not self.creds.valid:
             return None
             
-        ten_days_ago = datetime.utcnow() - timedelta(days=10)
-        time_min = ten_days_ago.isoformat() + 'Z'
-        
-        events_result = self.service.events().list(
-            calendarId='primary',
-            timeMin=time_min,
-            maxResults=200,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        # Filter out all-day events
-        events = events_result.get('items', [])
-        filtered_events = [
-            event for event in events 
-            if 'dateTime' in event.get('start', {})
-        ]
-        
-        return filtered_events
+        return [event for page in self.iter_event_pages() for event in page]
+
+    def iter_event_pages(self, outcome=None):
+        """Yields timed (non all-day) events page by page, syncing with Google as it goes."""
+        # Only fetches what changed since the last call (full resync on first call or expired token)
+        for page in self.calendar_sync.iter_pages(outcome):
+            # Filter out all-day events
+            yield [
+                event for event in page 
+                if 'dateTime' in event.get('start', {})
+            ]
 
     def delete_calendar_event(self, event_id):
         try:
@@ -186,9 +245,6 @@ class CalendarAPI:
                 eventId=event_id
             ).execute()
 
-            # Initialize Groq client
-            groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
-            
             system_prompt = """You are a calendar event editor. Given an existing event in Google Calendar JSON format and a user's edit request, determine what changes need to be made to the event.
 
             Your task is to:
@@ -227,7 +283,7 @@ class CalendarAPI:
             {"start": {"dateTime": "2024-03-20T15:00:00-07:00", "timeZone": "America/Los_Angeles"}, "end": {"dateTime": "2024-03-20T16:00:00-07:00", "timeZone": "America/Los_Angeles"}}
             {"location": "https://zoom.us/j/123456789"}"""
 
-            chat_completion = groq_client.chat.completions.create(
+            chat_completion = llm_client.chat_completion(
                 messages=[
                     {
                         "role": "system",
@@ -348,19 +404,64 @@ class CalendarAPI:
                 'message': f'Failed to create event: {str(e)}'
             }
 
-# Create global instances
-calendar_api = CalendarAPI()
-scheduling_agent = None  # Will be initialized after authentication
+# Each signed-in user's CalendarAPI (credentials, service clients, agent), built on first use
+calendar_sessions = SessionRegistry(CalendarAPI.for_user)
+
+def event_store_for(user_id):
+    """The user's mirrored EventStore, if their CalendarAPI is loaded; lets a rebuilt search tenant find it again."""
+    calendar_api = calendar_sessions.peek(user_id)
+    calendar_sync = getattr(calendar_api, 'calendar_sync', None)
+    return calendar_sync.store if calendar_sync is not None else None
+
+search_engine.event_store_for = event_store_for
+
+# The browser's session holds a random token; this maps it back to the account that signed in
+session_tokens = SessionTokens()
+
+def current_user_id():
+    """The signed-in user, DEFAULT_USER in single-user mode, else None."""
+    user_id = session_tokens.resolve(session.get('session_token'))
+    if user_id is None and SINGLE_USER_MODE:
+        return DEFAULT_USER
+    return user_id
 
-# Add a dictionary to store processing status
-processing_status = {}
+def current_calendar_api():
+    """The CalendarAPI for this request's user, or None when nobody is signed in."""
+    user_id = current_user_id()
+    return calendar_sessions.get(user_id) if user_id is not None else None
+
+def not_authenticated():
+    return jsonify({'error': 'Not authenticated'}), 401
+
+# Background scheduling requests: bounded workers, queue limit and expiry of finished jobs
+job_manager = JobManager()
+
+# Answers to /api/search questions, reused while the matched events are unchanged
+answer_cache = AnswerCache()
 
 @app.route('/')
 def hello_world():
     return "hello world"
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness: the process is up and serving requests
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    # Readiness: the search index has finished warming up
+    body = {
+        'status': 'ready' if search_engine.ready else search_engine.status,
+        'search_engine': search_engine.status,
+        'error': search_engine.error,
+        'startup': startup_profile.report()
+    }
+    return jsonify(body), 200 if search_engine.ready else 503
+
 @app.route('/login')
 def login():
+    calendar_api = current_calendar_api() or CalendarAPI()
     auth_url = calendar_api.login()
     if auth_url:
         session['state'] = calendar_api.auth_state
@@ -369,30 +470,115 @@ def login():
 
 @app.route('/callback')
 def callback():
-    calendar_api.login_callback(request.url)
+    calendar_api = CalendarAPI(DEFAULT_USER if SINGLE_USER_MODE else None)
+    calendar_api.login_callback(request.url, session.get('state'))
+    # Later requests from this browser use the account that just signed in
+    session_tokens.revoke(session.get('session_token'))
+    session['session_token'] = session_tokens.issue(calendar_api.user_id)
+    calendar_sessions.put(calendar_api.user_id, calendar_api)
     return redirect('http://localhost:3000')
 
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    events = calendar_api.get_events()
-    if events is None:
+    calendar_api = current_calendar_api()
+    if calendar_api is None or not calendar_api.creds or not calendar_api.creds.valid:
         return jsonify({'error': 'Not authenticated'}), 401
-    
-    print("Events retrieved from Google Calendar")
-    
+
+    # Set to {'complete': False} when the pages come from a mirror another full sync is still filling
+    pages_outcome = {}
+    pages = calendar_api.iter_event_pages(pages_outcome)
     try:
-        success = update_events_in_chroma(events)
-        if not success:
-            return jsonify({'error': 'Failed to update search index'}), 500
-        print("Events successfully updated in Chroma")
+        # Fetch the first page up front so Google or index errors can still produce a proper status code
+        first_page = next(pages, [])
+        index_sync = begin_index_sync(tenant_id=calendar_api.user_id)
+        index_sync.add_events(first_page)
     except Exception as e:
         print(f"Error updating events in Chroma: {str(e)}")
         return jsonify({'error': f'Failed to update search index: {str(e)}'}), 500
 
-    return jsonify({'events': events})
+    print("Events retrieved from Google Calendar")
+
+    def generate():
+        # Stream {"events": [...]} page by page, indexing each page before sending it
+        yield '{"events": ['
+        separator = ''
+        page = first_page
+        while page is not None:
+            for event in page:
+                yield separator + json.dumps(event)
+                separator = ','
+            page = next(pages, None)
+            if page is not None:
+                try:
+                    index_sync.add_events(page)
+                except Exception as e:
+                    print(f"Error updating events in Chroma: {str(e)}")
+        yield ']}'
+
+        try:
+            sync_stats = index_sync.finish(remove_stale=pages_outcome.get('complete', True))
+            print(f"Events successfully updated in Chroma: {sync_stats}")
+        except Exception as e:
+            print(f"Error updating events in Chroma: {str(e)}")
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def prepare_search_answer(query, n_results, user_id):
+    """
+    Runs the search and builds the answer prompt. Returns a dict with the matches, the
+    cache key and either a cached answer or the prompt to send; None if the search failed.
+    """
+    search_results = search_events(query, n_results, tenant_id=user_id)
+    if search_results is None:
+        return None
+        
+    # concatenate the best 3 matches
+    best_matches = search_results['documents'][0][:3]
+    today = datetime.now().strftime("%Y-%m-%d")
+    context_key = AnswerCache.context_key(search_results, today, limit=3)
+    query_embedding = None
+    if answer_cache.similarity_threshold is not None:
+        query_embedding = search_engine.embed_query(query)
+
+    prompt = f"""You are looking at a calendar event with this exact information: "{best_matches}"
+
+            Question: "{query}"
+            Today's date: {today}
+
+            Rules for your response:
+            1. ONLY use information explicitly stated in the event details
+            2. If asked about timing, include the EXACT date and time from the event
+            3. If information is not in the event details, say "I don't see that information in the event"
+            4. Keep responses under 20 words
+            5. Do not make assumptions about recurring events
+            6. Keep in mind today's date is {today}
+
+            Respond with ONLY the answer, no explanations or pleasantries."""
+
+    return {
+        'matches': best_matches,
+        'context_key': context_key,
+        'query_embedding': query_embedding,
+        'cached_answer': answer_cache.lookup(query, context_key, query_embedding),
+        'prompt': prompt
+    }
+
+def sse_message(data, event=None):
+    """One Server-Sent Events message with a JSON payload."""
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_response(generator):
+    return Response(stream_with_context(generator), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # let proxies pass tokens through immediately
+    })
 
 @app.route('/api/search', methods=['GET'])
 def search_calendar():
+    user_id = current_user_id()
+    if user_id is None:
+        return not_authenticated()
     query = request.args.get('q')
     if not query:
         return jsonify({'error': 'No search query provided'}), 400
@@ -401,31 +587,25 @@ def search_calendar():
     n_results = int(request.args.get('n', 5))
     
     try:
-        search_results = search_events(query, n_results)
-        if search_results is None:
+        search = prepare_search_answer(query, n_results, user_id)
+        if search is None:
             return jsonify({'error': 'Search failed'}), 500
-            
-        # concatenate the best 3 matches
-        best_matches = search_results['documents'][0][:3]
-        prompt = f"""You are looking at a calendar event with this exact information: "{best_matches}"
-
-            Question: "{query}"
-            Today's date: {datetime.now().strftime("%Y-%m-%d")}
 
-            Rules for your response:
-            1. ONLY use information explicitly stated in the event details
-            2. If asked about timing, include the EXACT date and time from the event
-            3. If information is not in the event details, say "I don't see that information in the event"
-            4. Keep responses under 20 words
-            5. Do not make assumptions about recurring events
-            6. Keep in mind today's date is {datetime.now().strftime("%Y-%m-%d")}
+        groq_response = search['cached_answer']
+        cached = groq_response is not None
+        if not cached:
+            started = time.perf_counter()
+            outcome = {}
+            groq_response = SchedulingAgent.get_groq_response(search['prompt'], outcome)
+            # A fallback after a timeout or rate limit must not be served again until the events change
+            if outcome.get('ok'):
+                answer_cache.store(query, search['context_key'], groq_response, time.perf_counter() - started,
+                                   search['query_embedding'])
 
-            Respond with ONLY the answer, no explanations or pleasantries."""
-        
-        groq_response = SchedulingAgent.get_groq_response(prompt)
         response = {
-            'matches': best_matches,
-            'answer': groq_response
+            'matches': search['matches'],
+            'answer': groq_response,
+            'cached': cached
         }
         
         return jsonify(response)
@@ -434,9 +614,77 @@ def search_calendar():
         print(f"Error during search: {str(e)}")
         return jsonify({'error': f'Search failed: {str(e)}'}), 500
 
+@app.route('/api/search/stream', methods=['GET'])
+def search_calendar_stream():
+    """
+    Same answer as /api/search over Server-Sent Events: a 'matches' event, then 'token'
+    events as the LLM generates, then 'done' with the full answer.
+    """
+    user_id = current_user_id()
+    if user_id is None:
+        return not_authenticated()
+    query = request.args.get('q')
+    if not query:
+        return jsonify({'error': 'No search query provided'}), 400
+    n_results = int(request.args.get('n', 5))
+
+    try:
+        search = prepare_search_answer(query, n_results, user_id)
+    except Exception as e:
+        print(f"Error during search: {str(e)}")
+        return jsonify({'error': f'Search failed: {str(e)}'}), 500
+    if search is None:
+        return jsonify({'error': 'Search failed'}), 500
+
+    def generate():
+        yield sse_message({'matches': search['matches']}, 'matches')
+        if search['cached_answer'] is not None:
+            yield sse_message({'text': search['cached_answer']}, 'token')
+            yield sse_message({'answer': search['cached_answer'], 'cached': True}, 'done')
+            return
+
+        started = time.perf_counter()
+        outcome = {}
+        parts = []
+        for text in SchedulingAgent.stream_groq_response(search['prompt'], outcome):
+            parts.append(text)
+            yield sse_message({'text': text}, 'token')
+        answer = ''.join(parts)
+        # Only a stream that completed is a whole answer
+        if outcome.get('ok'):
+            answer_cache.store(query, search['context_key'], answer, time.perf_counter() - started,
+                               search['query_embedding'])
+        yield sse_message({'answer': answer, 'cached': False}, 'done')
+
+    return sse_response(generate())
+
+@app.route('/api/search/stats', methods=['GET'])
+def search_stats():
+    user_id = current_user_id()
+    if user_id is None:
+        return not_authenticated()
+    return jsonify({
+        'answers': answer_cache.stats(),
+        'search': search_engine.cache_stats(user_id),
+        'preference_rules': rules_cache.stats()
+    })
+
+@app.route('/api/search/index/delete', methods=['POST'])
+def delete_search_index():
+    """Removes this user's documents from the search index; the next /api/events rebuilds it."""
+    user_id = current_user_id()
+    if user_id is None:
+        return not_authenticated()
+    try:
+        deleted = search_engine.delete_tenant(user_id)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Failed to delete search index: {str(e)}'}), 500
+    return jsonify({'status': 'success', 'deleted': deleted})
+
 @app.route('/api/auth-status', methods=['GET'])
 def auth_status():
-    is_authenticated = calendar_api.creds and calendar_api.creds.valid
+    calendar_api = current_calendar_api()
+    is_authenticated = bool(calendar_api is not None and calendar_api.creds and calendar_api.creds.valid)
     return jsonify({'isAuthenticated': is_authenticated})
 
 @app.route('/api/schedule', methods=['POST'])
@@ -449,7 +697,8 @@ def schedule_event():
     if request.method == 'OPTIONS':
         return ('', 204, response_headers)
 
-    if not calendar_api.service:
+    calendar_api = current_calendar_api()
+    if calendar_api is None or not calendar_api.service:
         return jsonify({
             'status': 'error',
             'message': 'Not authenticated'
@@ -464,10 +713,7 @@ def schedule_event():
                 'message': 'Missing required fields: action_query and preferences'
             }), 400, response_headers
 
-        # Initialize scheduling agent if needed
-        global scheduling_agent
-        if scheduling_agent is None:
-            scheduling_agent = SchedulingAgent(calendar_api.service, calendar_api.people_service)
+        scheduling_agent = calendar_api.get_scheduling_agent()
         
         # Process the scheduling request
         events_list = scheduling_agent.process_request(
@@ -498,9 +744,28 @@ def schedule_event():
             'message': f'Failed to process scheduling request: {str(e)}'
         }), 500, response_headers
 
+def run_schedule_job(job, calendar_api, query, preferences):
+    # Workers run outside the request, so the user's CalendarAPI is passed in rather than looked up
+    scheduling_agent = calendar_api.get_scheduling_agent()
+
+    # Every stage runs once for this request and reports itself to the job as it starts and finishes
+    context = PipelineContext(on_stage=job.report_stage)
+    try:
+        events_list = scheduling_agent.process_request(query, preferences, context)
+        return context.run('create', scheduling_agent.create_calendar_events, events_list)
+    finally:
+        job.timings.update(context.timings)
+
+def submit_schedule_job(calendar_api, query, preferences):
+    """Queues a scheduling job, or returns the one already running for this user and query."""
+    key = f"{calendar_api.user_id}_{query}"
+    return key, job_manager.submit(run_schedule_job, calendar_api, query, preferences, key=key,
+                                   owner=calendar_api.user_id)
+
 @app.route('/api/schedule/status', methods=['POST'])
 def schedule_status():
-    if not calendar_api.service:
+    calendar_api = current_calendar_api()
+    if calendar_api is None or not calendar_api.service:
         return jsonify({
             'error': 'Not authenticated'
         }), 401
@@ -513,80 +778,95 @@ def schedule_status():
         if not query:
             return jsonify({'error': 'No query provided'}), 400
 
-        # Get or create status for this query
-        status_key = f"{session.get('user_id', 'default')}_{query}"
-        if status_key not in processing_status:
-            # Initialize new processing status
-            processing_status[status_key] = {
-                'stage': 'Starting...',
-                'message': 'Initializing request...',
-                'complete': False,
-                'response': None
-            }
-            
-            # Start processing in background
-            def process_request():
-                try:
-                    # Initialize scheduling agent if needed
-                    global scheduling_agent
-                    if scheduling_agent is None:
-                        scheduling_agent = SchedulingAgent(calendar_api.service, calendar_api.people_service)
-
-                    # Update status for intent classification
-                    processing_status[status_key].update({
-                        'stage': 'Classifying intent...',
-                        'message': 'Determining if this is a create, edit, or delete request...'
-                    })
-                    intent = scheduling_agent.intent_agent.extract_intent(query)
-                    
-                    # Update status for preferences
-                    processing_status[status_key].update({
-                        'stage': 'Processing preferences...',
-                        'message': 'Analyzing your calendar preferences...'
-                    })
-                    
-                    # Update status for calendar check
-                    processing_status[status_key].update({
-                        'stage': 'Checking calendar...',
-                        'message': 'Looking up your availability...'
-                    })
-                    
-                    # Process the scheduling request
-                    events_list = scheduling_agent.process_request(query, preferences)
-                    
-                    # Update status for event creation
-                    processing_status[status_key].update({
-                        'stage': 'Creating events...',
-                        'message': 'Adding events to your calendar...'
-                    })
-                    
-                    # Create the calendar events
-                    response = scheduling_agent.create_calendar_events(events_list)
-                    
-                    # Update final status
-                    processing_status[status_key].update({
-                        'complete': True,
-                        'response': response
-                    })
-                    
-                except Exception as e:
-                    processing_status[status_key].update({
-                        'complete': True,
-                        'error': str(e)
-                    })
-
-            # Start processing thread
-            thread = threading.Thread(target=process_request)
-            thread.start()
-
-        # Return current status
-        return jsonify(processing_status[status_key])
+        # Polls for the same query share one job until its result has been returned once
+        key, job = submit_schedule_job(calendar_api, query, preferences)
+        status = job.to_dict()
+        if status['complete']:
+            job_manager.release(key)
+        return jsonify(status)
 
+    except QueueFull:
+        return jsonify({'error': 'Too many scheduling requests in progress, try again shortly'}), 429
     except Exception as e:
         return jsonify({
             'error': str(e)
         }), 500
 
+@app.route('/api/schedule/jobs', methods=['POST'])
+def create_schedule_job():
+    calendar_api = current_calendar_api()
+    if calendar_api is None or not calendar_api.service:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    data = request.get_json(silent=True) or {}
+    query = data.get('query')
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+
+    try:
+        _, job = submit_schedule_job(calendar_api, query, data.get('preferences', []))
+    except QueueFull:
+        return jsonify({'error': 'Too many scheduling requests in progress, try again shortly'}), 429
+    return jsonify(job.to_dict()), 202
+
+@app.route('/api/schedule/jobs/stats', methods=['GET'])
+def schedule_job_stats():
+    if current_user_id() is None:
+        return not_authenticated()
+    return jsonify(job_manager.stats())
+
+@app.route('/api/sessions/stats', methods=['GET'])
+def session_stats():
+    if current_user_id() is None:
+        return not_authenticated()
+    return jsonify(calendar_sessions.stats())
+
+@app.route('/api/schedule/jobs/<job_id>/events', methods=['GET'])
+def stream_schedule_job(job_id):
+    """
+    Pushes a job's progress as Server-Sent Events: a 'status' event on every stage change
+    and a final 'done' event with the result. GET /api/schedule/jobs/<job_id> remains the
+    polling fallback.
+    """
+    user_id = current_user_id()
+    if user_id is None:
+        return not_authenticated()
+    # Someone else's job looks exactly like a missing one
+    job = job_manager.get(job_id, owner=user_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+
+    def generate():
+        version = None
+        while True:
+            status = job.to_dict()
+            if status['complete']:
+                if job.key is not None:
+                    job_manager.release(job.key)
+                yield sse_message(status, 'done')
+                return
+            if status['version'] != version:
+                version = status['version']
+                yield sse_message(status, 'status')
+            if job.wait_for_change(version, JOB_EVENTS_KEEPALIVE_SECONDS) == version:
+                yield ': keep-alive\n\n'
+
+    return sse_response(generate())
+
+@app.route('/api/schedule/jobs/<job_id>', methods=['GET'])
+def get_schedule_job(job_id):
+    user_id = current_user_id()
+    if user_id is None:
+        return not_authenticated()
+    # Someone else's job looks exactly like a missing one
+    job = job_manager.get(job_id, owner=user_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    status = job.to_dict()
+    if status['complete'] and job.key is not None:
+        job_manager.release(job.key)
+    return jsonify(status)
+
 @app.route('/api/editOrDelete', methods=['POST'])
 def edit_or_delete():
     response_headers = {
@@ -597,7 +877,8 @@ def edit_or_delete():
     if request.method == 'OPTIONS':
         return ('', 204, response_headers)
 
-    if not calendar_api.service:
+    calendar_api = current_calendar_api()
+    if calendar_api is None or not calendar_api.service:
         return jsonify({
             'status': 'error',
             'message': 'Not authenticated'
@@ -642,44 +923,89 @@ def edit_or_delete():
         }), 500, response_headers
 
 
-@app.route('/api/welcome_msg', methods=['POST'])
-def set_welcome_message():
-    events = request.get_json()
-    if isinstance(events, str):
-        events = json.loads(events)  # Parse if it's a string
+def welcome_events(calendar_api, la_tz, today_info):
+    """Today's remaining events: from the local event store, else from the events the frontend posts."""
+    today = today_info.date()
 
-    events_data = list(events.values())[0]
+    events_today = None
+    if calendar_api is not None and calendar_api.calendar_sync is not None:
+        # Answer from the local event store rather than the events the frontend posts back
+        try:
+            calendar_api.calendar_sync.ensure_fresh()
+            end_of_day = la_tz.localize(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+            events_today = [
+                event for event in calendar_api.calendar_sync.events_between(
+                    int(today_info.timestamp()), int(end_of_day.timestamp())
+                )
+                if 'dateTime' in event.get('start', {})
+                and datetime.fromisoformat(event['start']['dateTime'].replace('Z', '+00:00')) > today_info
+            ]
+        except Exception as e:
+            print(f"Error reading today's events from the event store: {str(e)}")
+            events_today = None
 
-    la_tz = pytz.timezone('America/Los_Angeles')
-    today_info = datetime.now(la_tz)
-    today = datetime.now(la_tz).date()
+    if events_today is None:
+        events = request.get_json(silent=True)
+        if not events:
+            return []
+        if isinstance(events, str):
+            events = json.loads(events)  # Parse if it's a string
 
-    # Filter function
-    def is_event_today(event):
-        try:
-            # Parse the datetime string from the event
-            event_datetime = datetime.fromisoformat(
-                event['start']['dateTime'].replace('Z', '+00:00')
-            )
-            
-            # Convert to LA timezone if different
-            if event['start']['timeZone'] != 'America/Los_Angeles':
-                event_datetime = event_datetime.astimezone(la_tz)
+        events_data = list(events.values())[0]
+
+        # Filter function
+        def is_event_today(event):
+            try:
+                # Parse the datetime string from the event
+                event_datetime = datetime.fromisoformat(
+                    event['start']['dateTime'].replace('Z', '+00:00')
+                )
                 
-            # Compare only the date portion
-            return event_datetime.date() == today and event_datetime.ctime() > today_info.ctime()
-            
-        except (KeyError, ValueError):
-            return False
-    
-    # Filter the events
-    events_today = list(filter(is_event_today, events_data))
+                # Convert to LA timezone if different
+                if event['start']['timeZone'] != 'America/Los_Angeles':
+                    event_datetime = event_datetime.astimezone(la_tz)
+                    
+                # Compare only the date portion
+                return event_datetime.date() == today and event_datetime.ctime() > today_info.ctime()
+                
+            except (KeyError, ValueError):
+                return False
+        
+        # Filter the events
+        events_today = list(filter(is_event_today, events_data))
+        
+    return events_today
+
+@app.route('/api/welcome_msg', methods=['POST'])
+def set_welcome_message():
+    la_tz = pytz.timezone('America/Los_Angeles')
+    today_info = datetime.now(la_tz)
+    events_today = welcome_events(current_calendar_api(), la_tz, today_info)
         
     day_summary = get_groq_welcome(events_today, today_info.ctime())
     # print(day_summary)
 
     return jsonify({'message': day_summary})
 
+@app.route('/api/welcome_msg/stream', methods=['GET', 'POST'])
+def stream_welcome_message():
+    """The welcome message as Server-Sent Events: 'token' events as it is written, then 'done'."""
+    la_tz = pytz.timezone('America/Los_Angeles')
+    today_info = datetime.now(la_tz)
+    events_today = welcome_events(current_calendar_api(), la_tz, today_info)
+
+    def generate():
+        parts = []
+        for text in stream_groq_welcome(events_today, today_info.ctime()):
+            parts.append(text)
+            yield sse_message({'text': text}, 'token')
+        yield sse_message({'message': ''.join(parts)}, 'done')
+
+    return sse_response(generate())
+
+
+# Load the embedding model and connect to Chroma without blocking the server from starting
+search_engine.warm_up()
 
 if __name__ == '__main__':
     app.run(debug=True, use_reloader=True, port=5000)
\ No newline at end of file
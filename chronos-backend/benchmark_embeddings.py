@@ -0,0 +1,108 @@
+"""
+Compares the ONNX Runtime embedding backend against sentence-transformers.
+
+    python benchmark_embeddings.py                   # synthetic calendar corpus
+    python benchmark_embeddings.py --events events.json --k 5
+
+Reports throughput (texts/sec) for each backend, mean cosine similarity between the two
+backends' vectors for the same text, and recall@k of the ONNX nearest neighbours against
+the sentence-transformers ones.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+import argparse
+import random
+import json
+import time
+import os
+
+from common import DATA_DIR
+from search_engine import stringify_event, EMBEDDING_MODEL
+
+TITLES = ['Standup', 'Dentist appointment', 'Lunch with Connor', '1:1 with manager', 'Gym session',
+          'Project review', 'Coffee chat', 'Flight to Seattle', 'Team offsite', 'Doctor visit',
+          'Dinner with family', 'Interview loop', 'Sprint planning', 'Yoga class', 'Board meeting']
+PEOPLE = ['Connor Chan', 'Jennifer Lee', 'Neha Patel', 'Sam Rivera', 'Alex Kim']
+QUERIES = ['when is my dentist appointment', 'lunch with connor', 'do I have gym this week',
+           'meetings with jennifer', 'when is standup', 'what flights do I have', 'interview',
+           'yoga', 'project review with neha', 'dinner plans']
+
+
+def synthetic_events(count, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2024, 3, 1, 8, 0)
+    events = []
+    for i in range(count):
+        start = base + timedelta(days=rng.randint(0, 30), hours=rng.randint(0, 10), minutes=rng.choice([0, 30]))
+        event = {
+            'id': f'evt{i}',
+            'summary': rng.choice(TITLES),
+            'start': {'dateTime': start.isoformat() + '-07:00'},
+            'end': {'dateTime': (start + timedelta(minutes=rng.choice([30, 60, 90]))).isoformat() + '-07:00'},
+        }
+        if rng.random() < 0.5:
+            event['attendees'] = [{'email': f'{name.split()[0].lower()}@example.com', 'displayName': name}
+                                  for name in rng.sample(PEOPLE, rng.randint(1, 3))]
+        if rng.random() < 0.3:
+            event['description'] = f"Agenda: {rng.choice(TITLES).lower()} follow-ups"
+        events.append(event)
+    return events
+
+
+def timed_embed(embedder, texts):
+    embedder(texts[:8])  # warm-up
+    start = time.perf_counter()
+    vectors = np.array(embedder(texts), dtype=np.float32)
+    return vectors, time.perf_counter() - start
+
+
+def top_k(doc_vectors, query_vectors, k):
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', help='JSON file with a list of Google Calendar events')
+    parser.add_argument('--count', type=int, default=500, help='number of synthetic events')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--no-quantize', action='store_true', help='benchmark the fp32 ONNX model')
+    args = parser.parse_args()
+
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+    from onnx_embedder import OnnxEmbeddingFunction
+
+    if args.events:
+        with open(args.events) as f:
+            events = json.load(f)
+    else:
+        events = synthetic_events(args.count)
+    texts = [stringify_event(event) for event in events]
+
+    backends = {
+        'torch': SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL),
+        'onnx': OnnxEmbeddingFunction(
+            model_name=EMBEDDING_MODEL,
+            model_dir=os.path.join(DATA_DIR, 'onnx', EMBEDDING_MODEL),
+            quantize=not args.no_quantize
+        ),
+    }
+
+    doc_vectors, query_vectors = {}, {}
+    for name, embedder in backends.items():
+        doc_vectors[name], seconds = timed_embed(embedder, texts)
+        query_vectors[name] = np.array(embedder(QUERIES), dtype=np.float32)
+        print(f"{name:>6}: {len(texts)} texts in {seconds:.2f}s ({len(texts) / seconds:.0f} texts/sec)")
+
+    agreement = np.sum(doc_vectors['torch'] * doc_vectors['onnx'], axis=1)
+    print(f"cosine(torch, onnx): mean {agreement.mean():.4f}, min {agreement.min():.4f}")
+
+    k = min(args.k, len(texts))
+    reference = top_k(doc_vectors['torch'], query_vectors['torch'], k)
+    candidate = top_k(doc_vectors['onnx'], query_vectors['onnx'], k)
+    recall = np.mean([len(set(ref) & set(cand)) / k for ref, cand in zip(reference, candidate)])
+    print(f"recall@{k} of onnx against torch: {recall:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+import threading
+import logging
+import json
+import os
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with hit/miss counters."""
+
+    _MISSING = object()
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, self._MISSING)
+            if value is self._MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class PersistentLRUCache(LRUCache):
+    """
+    LRUCache of JSON-serializable values with string keys, written through to a JSON file
+    so entries survive restarts. Writes go to a temp file and are renamed into place.
+    """
+
+    def __init__(self, path, max_size=256):
+        super().__init__(max_size)
+        self.path = path
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache file {self.path}: {e}")
+            return
+        # Stored least recently used first, so replaying puts keeps the order and the size bound
+        for key, value in entries:
+            super().put(key, value)
+
+    def _save(self):
+        with self._save_lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump([[key, value] for key, value in self.items()], f)
+            os.replace(tmp_path, self.path)
+
+    def put(self, key, value):
+        super().put(key, value)
+        try:
+            self._save()
+        except OSError as e:
+            logging.warning(f"Could not persist cache to {self.path}: {e}")
+
+    def clear(self):
+        super().clear()
+        try:
+            self._save()
+        except OSError as e:
+            logging.warning(f"Could not persist cache to {self.path}: {e}")
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+import threading
+import time
+import os
+import logging
+
+from event_store import EventStore
+
+# Events are mirrored from this many days ago ...
+SYNC_LOOKBACK_DAYS = int(os.getenv('CALENDAR_SYNC_LOOKBACK_DAYS', 10))
+# ... up to this many days ahead (bounds the expansion of recurring events)
+SYNC_HORIZON_DAYS = int(os.getenv('CALENDAR_SYNC_HORIZON_DAYS', 180))
+# A full resync is forced after this long so the lookback/horizon window keeps moving
+FULL_RESYNC_HOURS = float(os.getenv('CALENDAR_FULL_RESYNC_HOURS', 24))
+PAGE_SIZE = int(os.getenv('CALENDAR_PAGE_SIZE', 250))
+# Availability and welcome reads sync first only when the mirror is older than this
+SYNC_MAX_AGE_SECONDS = float(os.getenv('CALENDAR_SYNC_MAX_AGE_SECONDS', 60))
+
+
+def iter_event_pages(service, calendar_id='primary', **params):
+    """
+    Yields raw events().list responses one page at a time, following nextPageToken.
+    The last page carries nextSyncToken when the request supports it.
+    """
+    page_token = None
+    while True:
+        response = service.events().list(
+            calendarId=calendar_id,
+            pageToken=page_token,
+            **params
+        ).execute()
+        yield response
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+
+class CalendarSync:
+    """
+    Keeps an EventStore mirror of one Google calendar current with incremental sync tokens.
+
+    The first sync lists the whole window and stores Google's nextSyncToken; later syncs
+    send only that token and receive just the events created, changed or cancelled since.
+    An expired token (410 Gone) triggers a full resync. The token lives in the store, so a
+    persistent store resumes incremental syncing across restarts.
+    """
+
+    def __init__(self, service, calendar_id='primary', store=None):
+        self.service = service
+        self.calendar_id = calendar_id
+        self.store = store if store is not None else EventStore()
+        self.last_sync = None
+        self.last_sync_at = None
+        # Guards store writes and sync state; never held while a page is handed to the caller
+        self._lock = threading.Lock()
+        self._full_sync_active = False
+
+    @property
+    def sync_token(self):
+        return self.store.get_meta(f'sync_token:{self.calendar_id}')
+
+    @property
+    def last_full_sync(self):
+        value = self.store.get_meta(f'last_full_sync:{self.calendar_id}')
+        return float(value) if value is not None else None
+
+    def sync(self):
+        """Brings the mirror up to date without streaming; returns what changed."""
+        for _ in self.iter_pages():
+            pass
+        return self.last_sync
+
+    def ensure_fresh(self, max_age_seconds=SYNC_MAX_AGE_SECONDS):
+        """Syncs only if the mirror is older than max_age_seconds, so hot paths read the store directly."""
+        if self.last_sync_at is None or time.time() - self.last_sync_at > max_age_seconds:
+            self.sync()
+
+    def iter_pages(self, outcome=None):
+        """
+        Syncs and yields the current calendar as lists of events, one page at a time.
+        A full sync streams pages straight from Google as they arrive; an incremental
+        sync applies the deltas first and then pages through the mirror. While another
+        caller is streaming a full sync, this one reads the mirror as it stands rather
+        than waiting for that (possibly slow) consumer. That mirror may still be missing
+        events, so outcome['complete'] is set to False; callers that delete whatever they
+        were not given (e.g. the search index) must skip that step.
+        """
+        full = False
+        with self._lock:
+            partial = self._full_sync_active
+            if outcome is not None:
+                outcome['complete'] = not partial
+            if not partial:
+                last_full_sync = self.last_full_sync
+                stale = last_full_sync is None or time.time() - last_full_sync > FULL_RESYNC_HOURS * 3600
+                full = self.sync_token is None or stale
+                if not full:
+                    try:
+                        self._incremental_sync()
+                    except Exception as e:
+                        if getattr(getattr(e, 'resp', None), 'status', None) != 410:
+                            raise
+                        logging.info("Calendar sync token expired, running a full resync")
+                        full = True
+                self._full_sync_active = full
+
+        if full:
+            try:
+                yield from self._full_sync()
+            finally:
+                with self._lock:
+                    self._full_sync_active = False
+            return
+
+        events = self.get_events()
+        for start in range(0, len(events), PAGE_SIZE):
+            yield events[start:start + PAGE_SIZE]
+
+    def _full_sync(self):
+        now = datetime.utcnow()
+        seen_ids = set()
+        sync_token = None
+        for response in iter_event_pages(
+            self.service,
+            self.calendar_id,
+            singleEvents=True,
+            timeMin=(now - timedelta(days=SYNC_LOOKBACK_DAYS)).isoformat() + 'Z',
+            timeMax=(now + timedelta(days=SYNC_HORIZON_DAYS)).isoformat() + 'Z',
+            maxResults=PAGE_SIZE
+        ):
+            page = [event for event in response.get('items', []) if event.get('status') != 'cancelled']
+            with self._lock:
+                self.store.upsert_events(page, self.calendar_id)
+            seen_ids.update(event['id'] for event in page)
+            sync_token = response.get('nextSyncToken', sync_token)
+            yield page
+
+        # Only drop stale events once every page has arrived
+        with self._lock:
+            removed = self.store.all_ids() - seen_ids
+            self.store.delete_events(removed)
+            self.store.set_meta(f'sync_token:{self.calendar_id}', sync_token)
+            self.store.set_meta(f'last_full_sync:{self.calendar_id}', time.time())
+            self.last_sync = {'mode': 'full', 'changed': len(seen_ids), 'removed': len(removed)}
+            self.last_sync_at = time.time()
+        logging.info(f"Full calendar sync fetched {len(seen_ids)} events")
+
+    def _incremental_sync(self):
+        changed, cancelled = [], []
+        sync_token = None
+        for response in iter_event_pages(
+            self.service,
+            self.calendar_id,
+            singleEvents=True,
+            syncToken=self.sync_token,
+            maxResults=PAGE_SIZE
+        ):
+            for event in response.get('items', []):
+                if event.get('status') == 'cancelled':
+                    cancelled.append(event['id'])
+                else:
+                    changed.append(event)
+            sync_token = response.get('nextSyncToken', sync_token)
+
+        self.store.upsert_events(changed, self.calendar_id)
+        self.store.delete_events(cancelled)
+        if sync_token:
+            self.store.set_meta(f'sync_token:{self.calendar_id}', sync_token)
+        self.last_sync = {'mode': 'incremental', 'changed': len(changed), 'removed': len(cancelled)}
+        self.last_sync_at = time.time()
+        logging.info(f"Incremental calendar sync: {len(changed)} changed, {len(cancelled)} removed")
+
+    def get_events(self):
+        """Mirrored events overlapping the lookback/horizon window, ordered by start time."""
+        now = time.time()
+        return self.store.events_between(
+            int(now - SYNC_LOOKBACK_DAYS * 86400),
+            int(now + SYNC_HORIZON_DAYS * 86400)
+        )
+
+    def events_between(self, start_ts, end_ts):
+        return self.store.events_between(start_ts, end_ts)
@@ -0,0 +1,24 @@
+from datetime import datetime
+import pytz
+import dotenv
+import os
+
+dotenv.load_dotenv()
+
+# Local state (event mirrors, caches, tokens) lives under this directory
+DATA_DIR = os.getenv('CHRONOS_DATA_DIR', '.chronos')
+
+# The single-account setup's user, tenant and file names
+DEFAULT_TENANT = 'default'
+
+
+def event_time_to_epoch(event_time):
+    """Epoch seconds for a Google start/end object; all-day dates are taken as Pacific midnight."""
+    if not event_time:
+        return None
+    if 'dateTime' in event_time:
+        return int(datetime.fromisoformat(event_time['dateTime'].replace('Z', '+00:00')).timestamp())
+    if 'date' in event_time:
+        tz = pytz.timezone(event_time.get('timeZone', 'America/Los_Angeles'))
+        return int(tz.localize(datetime.fromisoformat(event_time['date'])).timestamp())
+    return None
@@ -0,0 +1,196 @@
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from collections import OrderedDict
+import numpy as np
+import hashlib
+import threading
+import json
+import os
+import logging
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk embedding store.
+
+    Vectors live in a memory-mapped float32 file of `max_entries` rows; a small JSON
+    index maps each key to its row and keeps least-recently-used order for eviction.
+    New entries are appended to a log next to the index, so a put costs a few bytes of
+    disk I/O rather than a rewrite of the whole index; the log is folded into a fresh
+    snapshot (written atomically) once it grows past the index itself.
+    """
+
+    # The log is compacted into index.json once it holds more lines than this or than there are entries
+    MIN_COMPACT_LINES = 1024
+
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.index_path = os.path.join(path, 'index.json')
+        self.vectors_path = os.path.join(path, 'vectors.f32')
+        self.log_path = os.path.join(path, 'index.log')
+        self._log_lines = 0
+        self.dim = None
+        self.hits = 0
+        self.misses = 0
+        self._vectors = None
+        self._entries = OrderedDict()  # key -> row, oldest first
+        self._free_rows = []
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.index_path) and os.path.exists(self.vectors_path)):
+            return
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            if index['capacity'] != self.max_entries:
+                logging.info("Embedding cache capacity changed, starting fresh")
+                return
+            self._open_vectors(index['dim'], mode='r+')
+            self._entries = OrderedDict((key, row) for key, row in index['entries'])
+            if not self._replay_log():
+                # Fold the readable part into a snapshot so new lines are not appended after a torn one
+                self._save_index()
+            used = set(self._entries.values())
+            self._free_rows = [row for row in range(self.max_entries - 1, -1, -1) if row not in used]
+            logging.info(f"Loaded {len(self._entries)} cached embeddings from {self.path}")
+        except Exception as e:
+            logging.error(f"Failed to load embedding cache, starting fresh: {str(e)}")
+            self.dim = None
+            self._vectors = None
+            self._entries = OrderedDict()
+
+    def _replay_log(self):
+        """Applies index.log on top of the snapshot; False when it ends in a torn line."""
+        if not os.path.exists(self.log_path):
+            return True
+        keys_by_row = {row: key for key, row in self._entries.items()}
+        with open(self.log_path) as f:
+            for line in f:
+                try:
+                    key, row = json.loads(line)
+                except ValueError:
+                    # A write cut short by a crash; the vector it described may be incomplete too
+                    return False
+                # The row was reused, so whichever key held it before was evicted
+                previous = keys_by_row.get(row)
+                if previous is not None and previous != key:
+                    self._entries.pop(previous, None)
+                self._entries.pop(key, None)
+                self._entries[key] = row
+                keys_by_row[row] = key
+                self._log_lines += 1
+        return True
+
+    def _open_vectors(self, dim, mode):
+        self.dim = dim
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.max_entries, dim))
+        if mode == 'w+':
+            self._free_rows = list(range(self.max_entries - 1, -1, -1))
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'dim': self.dim,
+                'capacity': self.max_entries,
+                'entries': list(self._entries.items())
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        # Everything in the log is now in the snapshot
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._log_lines = 0
+
+    def _append_log(self, written):
+        with open(self.log_path, 'a') as f:
+            f.write(''.join(json.dumps([key, row]) + '\n' for key, row in written))
+        self._log_lines += len(written)
+        if self._log_lines > max(self.MIN_COMPACT_LINES, len(self._entries)):
+            self._save_index()
+
+    @staticmethod
+    def make_key(model_name, text):
+        return hashlib.sha1(f"{model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                row = self._entries.get(key)
+                if row is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = np.array(self._vectors[row])
+                self.hits += 1
+        return found
+
+    def put_many(self, vectors_by_key):
+        if not vectors_by_key:
+            return
+        with self._lock:
+            fresh = self._vectors is None
+            if fresh:
+                dim = len(next(iter(vectors_by_key.values())))
+                self._open_vectors(dim, mode='w+')
+
+            written = []
+            for key, vector in vectors_by_key.items():
+                if len(vector) != self.dim:
+                    logging.error(f"Embedding dimension {len(vector)} does not match cache dimension {self.dim}")
+                    continue
+                row = self._entries.get(key)
+                if row is None:
+                    if self._free_rows:
+                        row = self._free_rows.pop()
+                    else:
+                        # Evict the least recently used entry and reuse its row
+                        _, row = self._entries.popitem(last=False)
+                self._vectors[row] = np.asarray(vector, dtype=np.float32)
+                self._entries[key] = row
+                self._entries.move_to_end(key)
+                written.append((key, row))
+
+            # Vectors reach the disk before the log lines that point at them
+            self._vectors.flush()
+            if fresh:
+                # A new vectors file starts a new snapshot, replacing any index or log from an older one
+                self._save_index()
+            elif written:
+                self._append_log(written)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Wraps a Chroma embedding function so unchanged texts never reach the model."""
+
+    def __init__(self, embedder, model_name, cache):
+        self._embedder = embedder
+        self._model_name = model_name
+        self._cache = cache
+
+    def __call__(self, input: Documents) -> Embeddings:
+        keys = [EmbeddingCache.make_key(self._model_name, text) for text in input]
+        found = self._cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, input):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            computed = self._embedder(list(missing.values()))
+            new_vectors = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing.keys(), computed)
+            }
+            self._cache.put_many(new_vectors)
+            found.update(new_vectors)
+
+        logging.info(f"Embedding cache: {len(input) - len(missing)} hits, {len(missing)} computed")
+        return [found[key] for key in keys]
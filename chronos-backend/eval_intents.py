@@ -0,0 +1,99 @@
+"""
+Offline accuracy / latency check for the local intent classifier.
+
+    python eval_intents.py                  # keyword rules only (no model, no network)
+    python eval_intents.py --embed          # + nearest neighbour over MiniLM embeddings
+    python eval_intents.py --embed --llm    # + Groq fallback for the cases left over (needs GROQ_API_KEY)
+
+Reports, per agent, how many queries were answered locally, the accuracy of those answers,
+the end-to-end accuracy, and p50/p95 latency per query.
+"""
+import numpy as np
+import argparse
+import time
+
+from intent_classifier import IntentClassifier, INTENT_EXAMPLES, EDIT_OR_DELETE_EXAMPLES
+
+# Held out from the examples the classifier compares against
+INTENT_EVAL = [
+    ("grab lunch with neha tomorrow at noon", 'CREATE'), ("schedule a 1:1 with my manager next monday", 'CREATE'),
+    ("book a haircut saturday morning", 'CREATE'), ("let's play tennis thursday evening", 'CREATE'),
+    ("gym every monday and wednesday at 7am", 'CREATE'), ("coffee chat with alex next week", 'CREATE'),
+    ("set up a project kickoff on friday", 'CREATE'), ("team dinner next thursday", 'CREATE'),
+    ("yoga class tomorrow at 6pm", 'CREATE'), ("call mom on sunday afternoon", 'CREATE'),
+    ("cancel my flight to seattle", 'DELETE'), ("delete the standup on friday", 'DELETE'),
+    ("remove the dentist appointment", 'DELETE'), ("I can't make it to dinner tonight", 'DELETE'),
+    ("get rid of the gym session tomorrow", 'DELETE'), ("clear my afternoon", 'DELETE'),
+    ("move standup to 10am", 'EDIT'), ("reschedule the interview to next tuesday", 'EDIT'),
+    ("let's do lunch friday instead of thursday", 'EDIT'), ("push the review back an hour", 'EDIT'),
+    ("change the dinner to 8pm", 'EDIT'), ("shift my workout to the evening", 'EDIT'),
+    ("remove my dinner from friday and add it to saturday", 'EDIT'), ("cancel my dinner and book lunch instead", 'EDIT'),
+    ("what's the capital of spain", 'UNKNOWN'), ("how tall is mount everest", 'UNKNOWN'),
+    ("write me a poem", 'UNKNOWN'), ("what's 2 plus 2", 'UNKNOWN'),
+]
+
+EDIT_OR_DELETE_EVAL = [
+    ("cancel this", 'DELETE'), ("delete it", 'DELETE'), ("I'm not going anymore", 'DELETE'),
+    ("remove this event", 'DELETE'), ("please take this off my calendar", 'DELETE'),
+    ("can't make it", 'DELETE'), ("scrap this meeting", 'DELETE'),
+    ("move this to 5pm", 'EDIT'), ("make it 15 minutes shorter", 'EDIT'), ("add jennifer to this", 'EDIT'),
+    ("change the title to planning", 'EDIT'), ("push it to tomorrow", 'EDIT'), ("make it virtual", 'EDIT'),
+    ("update the location to the library", 'EDIT'), ("start it half an hour later", 'EDIT'),
+    ("remove my dinner from friday and add it to saturday", 'EDIT'), ("cancel tomorrow and schedule for friday", 'EDIT'),
+    ("delete this and create a new one on monday", 'EDIT'), ("cancel my dinner and book lunch instead", 'EDIT'),
+]
+
+
+def sentence_transformer_embed(model_name):
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True).tolist()
+
+
+def evaluate(name, classifier, dataset, llm_agent=None):
+    # Embed the examples up front so the first query's latency is not skewed
+    classifier.neighbour_intent('warm up')
+
+    local_correct = local_answered = correct = 0
+    latencies = []
+    for query, expected in dataset:
+        start = time.perf_counter()
+        label, source = classifier.classify(query)
+        if label is None and llm_agent is not None:
+            label = llm_agent.extract_intent(query).intent.strip().upper()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if source != 'llm':
+            local_answered += 1
+            local_correct += label == expected
+        correct += label == expected
+
+    latencies = np.array(latencies)
+    print(f"{name}: {len(dataset)} queries")
+    print(f"  answered locally: {local_answered}/{len(dataset)}"
+          f"  local accuracy: {local_correct / local_answered if local_answered else 0:.3f}")
+    print(f"  overall accuracy: {correct / len(dataset):.3f}  (unanswered counts as wrong without --llm)")
+    print(f"  latency p50: {np.percentile(latencies, 50):.2f} ms  p95: {np.percentile(latencies, 95):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--embed', action='store_true', help='use MiniLM nearest neighbour after the keyword rules')
+    parser.add_argument('--llm', action='store_true', help='fall back to Groq for queries left unclassified')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    args = parser.parse_args()
+
+    embed = sentence_transformer_embed(args.model) if args.embed else False
+    intent_agent = edit_agent = None
+    if args.llm:
+        from groq_engine import IntentAgent, EditOrDeleteIntentAgent
+        intent_agent, edit_agent = IntentAgent(), EditOrDeleteIntentAgent()
+        intent_agent.classifier.mode = edit_agent.classifier.mode = 'llm'
+
+    evaluate('IntentAgent', IntentClassifier(INTENT_EXAMPLES, ["CREATE", "DELETE", "EDIT", "UNKNOWN"], mode='hybrid',
+                                             embed=embed), INTENT_EVAL, intent_agent)
+    evaluate('EditOrDeleteIntentAgent', IntentClassifier(EDIT_OR_DELETE_EXAMPLES, ["EDIT", "DELETE", "UNKNOWN"],
+                                                         mode='hybrid', embed=embed), EDIT_OR_DELETE_EVAL, edit_agent)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import json
+import os
+import logging
+
+from common import event_time_to_epoch
+
+
+class EventStore:
+    """
+    SQLite mirror of calendar events with an R*Tree interval index on (start_ts, end_ts),
+    so "what overlaps this time range" is answered locally instead of by the Google API.
+    Also holds small sync metadata such as Google's sync token.
+    """
+
+    def __init__(self, path=':memory:'):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._has_rtree = True
+        self._create_schema()
+
+    def _create_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    rowid INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    calendar_id TEXT NOT NULL,
+                    start_ts INTEGER NOT NULL,
+                    end_ts INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            try:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS event_intervals USING rtree(id, start_ts, end_ts)"
+                )
+            except sqlite3.OperationalError:
+                # SQLite built without R*Tree: fall back to a B-tree on the interval bounds
+                logging.info("SQLite R*Tree module unavailable, using a B-tree interval index")
+                self._has_rtree = False
+                self._conn.execute("CREATE INDEX IF NOT EXISTS events_interval ON events (start_ts, end_ts)")
+
+    def upsert_events(self, events, calendar_id='primary'):
+        rows = []
+        for event in events:
+            start_ts = event_time_to_epoch(event.get('start'))
+            end_ts = event_time_to_epoch(event.get('end'))
+            if 'id' not in event or start_ts is None:
+                continue
+            rows.append((event['id'], calendar_id, start_ts, end_ts if end_ts is not None else start_ts, json.dumps(event)))
+
+        with self._lock, self._conn:
+            for row in rows:
+                self._conn.execute(
+                    """
+                    INSERT INTO events (id, calendar_id, start_ts, end_ts, data) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET calendar_id = excluded.calendar_id, start_ts = excluded.start_ts,
+                        end_ts = excluded.end_ts, data = excluded.data
+                    """,
+                    row
+                )
+                rowid = self._conn.execute("SELECT rowid FROM events WHERE id = ?", (row[0],)).fetchone()[0]
+                if self._has_rtree:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO event_intervals (id, start_ts, end_ts) VALUES (?, ?, ?)",
+                        (rowid, row[2], row[3])
+                    )
+        return len(rows)
+
+    def delete_events(self, event_ids):
+        event_ids = list(event_ids)
+        with self._lock, self._conn:
+            for event_id in event_ids:
+                row = self._conn.execute("SELECT rowid FROM events WHERE id = ?", (event_id,)).fetchone()
+                if row is None:
+                    continue
+                self._conn.execute("DELETE FROM events WHERE rowid = ?", row)
+                if self._has_rtree:
+                    self._conn.execute("DELETE FROM event_intervals WHERE id = ?", row)
+        return len(event_ids)
+
+    def all_ids(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM events")}
+
+    def events_between(self, start_ts, end_ts):
+        """Events overlapping [start_ts, end_ts), ordered by start time."""
+        return [json.loads(row[1]) for row in self._query_between(start_ts, end_ts, 'e.id, e.data')]
+
+    def ids_between(self, start_ts, end_ts):
+        return [row[0] for row in self._query_between(start_ts, end_ts, 'e.id')]
+
+    def _query_between(self, start_ts, end_ts, columns):
+        with self._lock:
+            if self._has_rtree:
+                # The R*Tree stores 32-bit float bounds, so re-check the exact columns after the index lookup
+                return self._conn.execute(
+                    f"""
+                    SELECT {columns} FROM event_intervals i JOIN events e ON e.rowid = i.id
+                    WHERE i.start_ts <= ? AND i.end_ts >= ? AND e.start_ts < ? AND e.end_ts > ?
+                    ORDER BY e.start_ts
+                    """,
+                    (end_ts, start_ts, end_ts, start_ts)
+                ).fetchall()
+            return self._conn.execute(
+                f"SELECT {columns} FROM events e WHERE e.start_ts < ? AND e.end_ts > ? ORDER BY e.start_ts",
+                (end_ts, start_ts)
+            ).fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            if value is None:
+                self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+import pytz
+import os
+
+from common import event_time_to_epoch
+
+DEFAULT_TIMEZONE = 'America/Los_Angeles'
+# Free time is only reported inside these local hours
+DAY_START_HOUR = int(os.getenv('FREEBUSY_DAY_START_HOUR', 7))
+DAY_END_HOUR = int(os.getenv('FREEBUSY_DAY_END_HOUR', 22))
+# Gaps shorter than this are not worth offering as slots
+MIN_SLOT_MINUTES = int(os.getenv('FREEBUSY_MIN_SLOT_MINUTES', 15))
+
+
+def _blocks_time(event):
+    """False for events marked 'free' and for invitations the user declined."""
+    if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+        return False
+    for attendee in event.get('attendees', []):
+        if attendee.get('self') and attendee.get('responseStatus') == 'declined':
+            return False
+    return True
+
+
+def busy_intervals(events):
+    """(start_ts, end_ts) for every event that blocks time."""
+    intervals = []
+    for event in events:
+        if not _blocks_time(event):
+            continue
+        start_ts = event_time_to_epoch(event.get('start'))
+        end_ts = event_time_to_epoch(event.get('end'))
+        if start_ts is not None and end_ts is not None and end_ts > start_ts:
+            intervals.append((start_ts, end_ts))
+    return intervals
+
+
+def query_google_freebusy(service, start, end, calendar_ids=('primary',)):
+    """Busy intervals straight from Google's freebusy.query endpoint (one request, no event bodies)."""
+    response = service.freebusy().query(body={
+        'timeMin': start.isoformat(),
+        'timeMax': end.isoformat(),
+        'items': [{'id': calendar_id} for calendar_id in calendar_ids]
+    }).execute()
+    intervals = []
+    for calendar in response.get('calendars', {}).values():
+        for busy in calendar.get('busy', []):
+            intervals.append((
+                event_time_to_epoch({'dateTime': busy['start']}),
+                event_time_to_epoch({'dateTime': busy['end']})
+            ))
+    return intervals
+
+
+def merge_intervals(intervals):
+    """Sorts and merges overlapping or touching intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _working_windows(start_ts, end_ts, tz, day_start_hour, day_end_hour):
+    """Per-day [day_start_hour, day_end_hour) local windows clipped to [start_ts, end_ts)."""
+    day = datetime.fromtimestamp(start_ts, tz).date()
+    last_day = datetime.fromtimestamp(end_ts, tz).date()
+    while day <= last_day:
+        midnight = datetime(day.year, day.month, day.day)
+        window_start = int(tz.localize(midnight + timedelta(hours=day_start_hour)).timestamp())
+        window_end = int(tz.localize(midnight + timedelta(hours=day_end_hour)).timestamp())
+        window_start, window_end = max(window_start, start_ts), min(window_end, end_ts)
+        if window_end > window_start:
+            yield window_start, window_end
+        day += timedelta(days=1)
+
+
+def free_slots(busy, start_ts, end_ts, min_minutes=MIN_SLOT_MINUTES, timezone=DEFAULT_TIMEZONE,
+               day_start_hour=DAY_START_HOUR, day_end_hour=DAY_END_HOUR):
+    """
+    Free (start_ts, end_ts) gaps of at least min_minutes inside local working hours,
+    found with a single sweep over the merged busy intervals.
+    """
+    tz = pytz.timezone(timezone)
+    merged = merge_intervals(busy)
+    slots = []
+    i = 0
+    for window_start, window_end in _working_windows(start_ts, end_ts, tz, day_start_hour, day_end_hour):
+        # Busy intervals are sorted, so skip the ones that ended before this window once and for all
+        while i < len(merged) and merged[i][1] <= window_start:
+            i += 1
+        cursor = window_start
+        j = i
+        while j < len(merged) and merged[j][0] < window_end:
+            busy_start, busy_end = merged[j]
+            if busy_start - cursor >= min_minutes * 60:
+                slots.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            j += 1
+        if window_end - cursor >= min_minutes * 60:
+            slots.append((cursor, window_end))
+    return slots
+
+
+def slots_as_dicts(slots, timezone=DEFAULT_TIMEZONE):
+    tz = pytz.timezone(timezone)
+    return [
+        {
+            'start': datetime.fromtimestamp(start, tz).isoformat(),
+            'end': datetime.fromtimestamp(end, tz).isoformat()
+        }
+        for start, end in slots
+    ]
+
+
+def format_slots_for_prompt(slots, timezone=DEFAULT_TIMEZONE):
+    """One short line per day, e.g. 'Wed 2024-03-06: 09:00-10:30, 13:00-17:00'."""
+    tz = pytz.timezone(timezone)
+    days = {}
+    for start, end in slots:
+        start_dt = datetime.fromtimestamp(start, tz)
+        end_dt = datetime.fromtimestamp(end, tz)
+        days.setdefault(start_dt.strftime('%a %Y-%m-%d'), []).append(
+            f"{start_dt.strftime('%H:%M')}-{end_dt.strftime('%H:%M')}"
+        )
+    return '\n'.join(f"{day}: {', '.join(ranges)}" for day, ranges in days.items())
@@ -1,14 +1,21 @@
-from groq import Groq
 import os
-from dotenv import load_dotenv
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 import pytz
 import json
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-
-load_dotenv()
+import threading
+import logging
+import time
+import re
+from freebusy import busy_intervals, query_google_freebusy, merge_intervals, free_slots, format_slots_for_prompt
+from slot_solver import solve, event_from_slot, format_candidates
+from rules_cache import rules_cache, normalize_preferences
+from pipeline import PipelineContext
+import llm_client
+from intent_classifier import IntentClassifier, INTENT_EXAMPLES, EDIT_OR_DELETE_EXAMPLES
+
+# 'assist' gives the LLM solver-picked slots and corrects its times; 'direct' skips the LLM for single events
+SOLVER_MODE = os.getenv('SCHEDULER_SOLVER_MODE', 'assist')
 
 sample_action_query = "drink with connor on wednesday"
 sample_preferences = [
@@ -28,8 +35,8 @@ class IntentAgent():
             return values
 
     def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
         self.intents = ["CREATE", "DELETE", "EDIT", "UNKNOWN"]
+        self.classifier = IntentClassifier(INTENT_EXAMPLES, self.intents)
         self.system_prompt = """You are an intent classifier for a calendar application. Your task is to analyze user requests and classify them into one of four possible intents: CREATE, DELETE, EDIT, or UNKNOWN.
 
             Guidelines for classification:
@@ -56,7 +63,12 @@ class IntentAgent():
             "What's the weather like?" → UNKNOWN"""
 
     def extract_intent(self, query):
-        chat_completion = self.groq_client.chat.completions.create(
+        # Clear-cut queries are classified locally; only ambiguous ones reach the LLM
+        intent, _ = self.classifier.classify(query)
+        if intent is not None:
+            return self.Intents(intent=intent)
+
+        chat_completion = llm_client.chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -73,65 +85,46 @@ class IntentAgent():
         return self.Intents(intent=response)
 
 class AvailabilityAgent():
-    def __init__(self, service):
+    def __init__(self, service, calendar_sync=None):
         self.service = service
+        self.calendar_sync = calendar_sync
+
+    def get_busy_intervals(self, start, end):
+        """Busy (start_ts, end_ts) intervals: from the local event store when available, else Google's freebusy.query."""
+        if self.calendar_sync is not None:
+            try:
+                self.calendar_sync.ensure_fresh()
+                return busy_intervals(
+                    self.calendar_sync.events_between(int(start.timestamp()), int(end.timestamp()))
+                )
+            except Exception as e:
+                print(f"Error reading event store, falling back to Google: {str(e)}")
 
-    def get_two_week_availability(self):
+        return query_google_freebusy(self.service, start, end)
+
+    def get_busy(self, days=14):
         now = datetime.now(pytz.UTC)
-        one_week = now + timedelta(days=14)
-        now_str = now.isoformat()
-        week_str = one_week.isoformat()
-        
-        events_result = self.service.events().list(
-            calendarId='primary',
-            timeMin=now_str,
-            timeMax=week_str,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-        
-        events = events_result.get('items', [])
-        
-        if not events:
-            return "You have no events scheduled for the next week."
-        
-        days = {}
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-            day_key = start_dt.strftime('%Y-%m-%d')
-            
-            if day_key not in days:
-                days[day_key] = []
-            
-            days[day_key].append({
-                'summary': event.get('summary', 'Untitled event'),
-                'start': start_dt,
-                'end': datetime.fromisoformat(
-                    event['end'].get('dateTime', event['end'].get('date')).replace('Z', '+00:00')
-                )
-            })
-        
-        summary = []
-        for day_key in sorted(days.keys()):
-            day_events = days[day_key]
-            day_date = datetime.strptime(day_key, '%Y-%m-%d')
-            day_str = day_date.strftime('%A, %B %d')
-            
-            events_str = []
-            for event in day_events:
-                time_str = f"{event['start'].strftime('%I:%M %p')} to {event['end'].strftime('%I:%M %p')}"
-                events_str.append(f"{event['summary']} from {time_str}")
-            
-            day_summary = f"On {day_str}, you have {len(events_str)} event{'s' if len(events_str) > 1 else ''}: "
-            day_summary += '; '.join(events_str)
-            summary.append(day_summary)
+        return merge_intervals(self.get_busy_intervals(now, now + timedelta(days=days)))
+
+    def get_free_slots(self, days=14, busy=None):
+        """Free (start_ts, end_ts) slots from now until `days` ahead, within working hours."""
+        now = datetime.now(pytz.UTC)
+        end = now + timedelta(days=days)
+        if busy is None:
+            busy = self.get_busy(days)
+        return free_slots(busy, int(now.timestamp()), int(end.timestamp()))
+
+    def get_two_week_availability(self, busy=None):
+        slots = self.get_free_slots(days=14, busy=busy)
+        if not slots:
+            return "You have no free time in the next two weeks."
         
-        return "\n\n".join(summary)
+        # One compact line per day keeps the prompt small
+        return "Free time slots (America/Los_Angeles):\n" + format_slots_for_prompt(slots)
 
 class PreferencesAgent:
     def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.model = "llama3-70b-8192"
         self.system_prompt = """You are a preferences analyzer for a calendar application. Your task is to convert natural language preferences into strict time-based rules.
 
             For each preference, extract:
@@ -156,9 +149,19 @@ class PreferencesAgent:
             If a preference is unclear or can't be converted to a rule, skip it."""
 
     def get_rule_based_preferences(self, preferences: list[str]):
+        if not normalize_preferences(preferences):
+            return json.dumps({'rules': []})
+
+        # Preference lists rarely change between requests, so compiled rules are reused
+        cache_key = rules_cache.key(preferences, self.system_prompt, self.model)
+        cached = rules_cache.lookup(cache_key)
+        if cached is not None:
+            return cached
+
         preferences_text = "\n".join([f"- {pref}" for pref in preferences])
         
-        chat_completion = self.groq_client.chat.completions.create(
+        started = time.perf_counter()
+        chat_completion = llm_client.chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -169,10 +172,12 @@ class PreferencesAgent:
                     "content": f"Convert these preferences to rules:\n{preferences_text}",
                 }
             ],
-            model="llama3-70b-8192",
+            model=self.model,
         )
         
-        return chat_completion.choices[0].message.content
+        rules = chat_completion.choices[0].message.content
+        rules_cache.store(cache_key, rules, time.perf_counter() - started)
+        return rules
 
 class ContactAgent:
     def __init__(self, people_service):
@@ -262,15 +267,16 @@ class ContactAgent:
         return email_matches
 
 class SchedulingAgent:
-    def __init__(self, service, people_service):
+    def __init__(self, service, people_service, calendar_sync=None):
+        self.last_timings = {}
         self.intent_agent = IntentAgent()
-        self.availability_agent = AvailabilityAgent(service)
+        self.availability_agent = AvailabilityAgent(service, calendar_sync)
         self.preferences_agent = PreferencesAgent()
-        self.groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
         self.service = service
         self.people_service = people_service
-        self.contacts = ContactAgent(people_service).email_lookup()
-        # print("contacts", self.contacts)
+        # Contacts are fetched on first use, concurrently with the other stages
+        self.contacts = None
+        self._contacts_lock = threading.Lock()
         pacific_tz = pytz.timezone('America/Los_Angeles')
         now = datetime.now(pacific_tz)
         current_date = now.strftime('%Y-%m-%d')
@@ -384,14 +390,75 @@ class SchedulingAgent:
                 'message': f'Failed to create events: {str(e)}'
             }
 
-    def process_request(self, action_query: str, preferences: list[str]):
-        """Process a calendar request and return the event details"""
+    def _enforce_rules(self, events_list, action_query, solver):
+        """Moves LLM-picked times that break a preference rule or overlap a busy slot to the solver's best slot that day."""
+        tz = pytz.timezone('America/Los_Angeles')
+        for event_details in events_list:
+            try:
+                start = datetime.fromisoformat(event_details['start']['dateTime'].replace('Z', '+00:00'))
+                end = datetime.fromisoformat(event_details['end']['dateTime'].replace('Z', '+00:00'))
+            except (ValueError, AttributeError):
+                continue
+            if start.tzinfo is None:
+                start, end = tz.localize(start), tz.localize(end)
+            start_ts, end_ts = int(start.timestamp()), int(end.timestamp())
+            # Only events inside the solver's horizon can be checked
+            if end_ts <= start_ts or start_ts < solver.start_ts or end_ts > solver.end_ts:
+                continue
+            if solver.is_allowed(action_query, start_ts, end_ts):
+                continue
+
+            day = start.astimezone(tz).date()
+            day_start = tz.localize(datetime(day.year, day.month, day.day))
+            day_end = tz.localize(datetime(day.year, day.month, day.day) + timedelta(days=1))
+            slots = solver.find_slots(action_query, (end_ts - start_ts) // 60,
+                                      (day_start.timestamp(), day_end.timestamp()), count=1)
+            if not slots:
+                continue
+            logging.info(f"Moved '{event_details.get('summary')}' from {start.isoformat()} to satisfy preferences")
+            event_details['start']['dateTime'] = datetime.fromtimestamp(slots[0][0], tz).isoformat()
+            event_details['end']['dateTime'] = datetime.fromtimestamp(slots[0][1], tz).isoformat()
+
+    def get_contacts(self):
+        with self._contacts_lock:
+            if self.contacts is None:
+                self.contacts = ContactAgent(self.people_service).email_lookup()
+            return self.contacts
+
+    def process_request(self, action_query: str, preferences: list[str], context=None):
+        """
+        Process a calendar request and return the event details. Stages already run in
+        `context` (a PipelineContext shared with the caller) are not run again.
+        """
+        context = context if context is not None else PipelineContext()
+        self.last_timings = context.timings
         try:
-            intent = self.intent_agent.extract_intent(action_query)
-            preference_rules = self.preferences_agent.get_rule_based_preferences(preferences)
+            # None of these depend on each other, so the request waits for the slowest one rather than the sum.
+            # Availability and contacts are fetched speculatively; a DELETE simply never reads them.
+            intent_future = context.submit('intent', self.intent_agent.extract_intent, action_query)
+            rules_future = context.submit('rules', self.preferences_agent.get_rule_based_preferences, preferences)
+            busy_future = context.submit('availability', self.availability_agent.get_busy)
+            contacts_future = context.submit('contacts', self.get_contacts)
+            intent = intent_future.result()
             
             if intent.intent in ["CREATE", "EDIT"]:
-                chat_completion = self.groq_client.chat.completions.create(
+                preference_rules = rules_future.result()
+                busy = busy_future.result()
+                solver, _, candidates = context.run('solver', solve, action_query, preference_rules, busy)
+                logging.debug(f"Solver candidates: {candidates}")
+
+                # A single new event needs nothing from the LLM once the solver has picked its time
+                if SOLVER_MODE == 'direct' and candidates and intent.intent == "CREATE" \
+                        and not re.search(r'\b(and|every|each)\b', action_query.lower()):
+                    event_details = event_from_slot(action_query, candidates[0])
+                    event_details['attendees'] = [
+                        {'email': email} for email in re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', action_query)
+                    ]
+                    return [event_details]
+
+                chat_completion = context.run(
+                    'llm',
+                    llm_client.chat_completion,
                     messages=[
                         {
                             "role": "system",
@@ -401,8 +468,10 @@ class SchedulingAgent:
                             "role": "user",
                             "content": f"""Action: {action_query}
                             User Preferences: {preference_rules}
-                            Current Availability: {self.availability_agent.get_two_week_availability() if self.availability_agent else 'Not available'}
-                            Contacts: {self.contacts}
+                            Current Availability: {self.availability_agent.get_two_week_availability(busy)}
+                            Suggested Slots (already checked against the preferences and availability, use the first one unless the query asks for something else):
+{format_candidates(candidates) or 'None found'}
+                            Contacts: {contacts_future.result()}
                             
                             Generate calendar event JSON that respects these preferences and availability.
                             If the query implies multiple events, return an array of events.
@@ -476,6 +545,7 @@ class SchedulingAgent:
                             for email in emails:
                                 event_details['attendees'].append({'email': email})
 
+                    self._enforce_rules(events_list, action_query, solver)
                     return events_list
 
                 except json.JSONDecodeError as e:
@@ -503,62 +573,65 @@ class SchedulingAgent:
                 'message': f'Failed to process request: {str(e)}',
                 'traceback': str(e.__traceback__)
             }
+        finally:
+            context.timings['total'] = context.elapsed()
+            logging.info(f"process_request stage timings (s): {context.timings}")
         
     @staticmethod
-    def get_groq_response(prompt):
+    def get_groq_response(prompt, outcome=None):
+        """The answer, or SEARCH_ANSWER_FALLBACK on failure; outcome['ok'] tells the two apart."""
         try:
-            from groq import Groq
-            import os
-            from dotenv import load_dotenv
-            
-            load_dotenv()
-            groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
-            
-            completion = groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are a precise calendar assistant that ONLY states facts directly from event information.
+            completion = llm_client.chat_completion(**search_answer_request(prompt))
+            _report(outcome, True)
+            return completion.choices[0].message.content
+        except Exception as e:
+            print(f"Error getting Groq response: {str(e)}")
+            _report(outcome, False)
+            return SEARCH_ANSWER_FALLBACK
+
+    @staticmethod
+    def stream_groq_response(prompt, outcome=None):
+        """Like get_groq_response, but yields the answer piece by piece as Groq generates it."""
+        yield from _stream_or_fallback(search_answer_request(prompt), SEARCH_ANSWER_FALLBACK, outcome)
+        
+
+SEARCH_ANSWER_FALLBACK = "I couldn't find that information in the calendar."
+WELCOME_FALLBACK = "My name is Chronos, an AI scheduling assistant. How can I help?"
+
+
+def search_answer_request(prompt):
+    return dict(
+        messages=[
+            {
+                "role": "system",
+                "content": """You are a precise calendar assistant that ONLY states facts directly from event information.
                         - IMPORTANT: If the event is recurring, include ONLY that and the times it recurs in the response
                         - Never make assumptions about events
                         - Only use explicitly stated information
                         - Use exact dates and times
                         - Keep responses under 20 words
                         - If information isn't in the event details, say so"""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model="llama3-8b-8192",
-                temperature=0.1  # Add low temperature for more precise responses
-            )
-            
-            return completion.choices[0].message.content
-        except Exception as e:
-            print(f"Error getting Groq response: {str(e)}")
-            return "I couldn't find that information in the calendar."
-        
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+        model="llama3-8b-8192",
+        temperature=0.1  # Add low temperature for more precise responses
+    )
 
-def get_groq_welcome(events_today, current_time):
-    try:
-        from groq import Groq
-        import os
-        from dotenv import load_dotenv
-        
-        load_dotenv()
-        groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
 
-        # Convert events_today to string if it's not already
-        events_str = str(events_today) if events_today is not None else "No events found for today."
-        current_time_str = str(current_time) if current_time is not None else "No current time found."
+def welcome_request(events_today, current_time):
+    # Convert events_today to string if it's not already
+    events_str = str(events_today) if events_today is not None else "No events found for today."
+    current_time_str = str(current_time) if current_time is not None else "No current time found."
 
-        completion = groq_client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": """You are a calendar assistant. You will be given two pieces of information: a data structure of upcoming events for today in the calendar, and the current time of day. 
+    return dict(
+        messages=[
+            {
+                "role": "system",
+                "content": """You are a calendar assistant. You will be given two pieces of information: a data structure of upcoming events for today in the calendar, and the current time of day. 
                     Your task is to write a brief and informative summary of the user's day ahead. You should humanize the response, but keep it very professional and concise. Start the response with a friendly greeting, dependent on the time of day. 
                     That means its okay to mention holidays (ONLY if known), company anniversaries (ONLY if known), things to look forward to, important meetings, etc. If there are no upcoming events, let the user know with a upbeat response.
                     - IMPORTANT: Format it like a company would format meeting minutes. Use markdown formatting to make it look nice.
@@ -566,19 +639,49 @@ def get_groq_welcome(events_today, current_time):
                     -Give 1-2 "important reminders" bullet points beneath the day's scheduling breakdown, but do not assume or hallucinate any information. Only give important reminders that revolve around things that are explictly obvious. Here is an example of an important reminder: "Prepare for your meeting with Jennifer tonight". THIS IS AN EXAMPLE, DO NOT USE THIS FOR THE USER.
                     -No redundant information
                     -Maximum 70 words."""
-                },
-                {
-                    "role": "user",
-                    "content": f"Events for today: {events_str} Current time: {current_time_str}"
-                }
-            ],
-            model="llama3-70b-8192",
-            temperature=0.2
-        )
+            },
+            {
+                "role": "user",
+                "content": f"Events for today: {events_str} Current time: {current_time_str}"
+            }
+        ],
+        model="llama3-70b-8192",
+        temperature=0.2
+    )
+
+
+def _report(outcome, ok):
+    # Callers pass a dict to learn whether the text came from the LLM or is a fallback/partial answer
+    if outcome is not None:
+        outcome['ok'] = ok
+
+
+def _stream_or_fallback(request, fallback, outcome=None):
+    sent = False
+    try:
+        for text in llm_client.stream_chat_completion(**request):
+            sent = True
+            yield text
+        _report(outcome, True)
+    except Exception as e:
+        print(f"Error streaming Groq response: {str(e)}")
+        _report(outcome, False)
+        # A stream that broke half way has already shown part of an answer; only fill in an empty one
+        if not sent:
+            yield fallback
+
+
+def get_groq_welcome(events_today, current_time):
+    try:
+        completion = llm_client.chat_completion(**welcome_request(events_today, current_time))
         return completion.choices[0].message.content
     except Exception as e:
         print(f"Error getting Groq response: {str(e)}")
-        return "My name is Chronos, an AI scheduling assistant. How can I help?"
+        return WELCOME_FALLBACK
+
+
+def stream_groq_welcome(events_today, current_time):
+    yield from _stream_or_fallback(welcome_request(events_today, current_time), WELCOME_FALLBACK)
 
 
 
@@ -593,7 +696,7 @@ class EditOrDeleteIntentAgent:
             return values
 
     def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.classifier = IntentClassifier(EDIT_OR_DELETE_EXAMPLES, ["EDIT", "DELETE", "UNKNOWN"])
         self.system_prompt = """You are a specialized intent classifier for calendar event modifications. Your task is to analyze user requests about EXISTING calendar events and classify them as either EDIT or DELETE. You must output EXACTLY one of these two words.
 
         Guidelines for classification:
@@ -643,7 +746,11 @@ class EditOrDeleteIntentAgent:
         If you cannot determine the intent, output UNKNOWN."""
 
     def extract_intent(self, query):
-        chat_completion = self.groq_client.chat.completions.create(
+        intent, _ = self.classifier.classify(query)
+        if intent is not None:
+            return self.Intents(intent=intent)
+
+        chat_completion = llm_client.chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -662,6 +769,9 @@ class EditOrDeleteIntentAgent:
 # Update the test code
 if __name__ == "__main__":
     try:
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         SCOPES = [
             'https://www.googleapis.com/auth/calendar',
             'https://www.googleapis.com/auth/calendar.readonly',
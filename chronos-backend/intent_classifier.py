@@ -0,0 +1,165 @@
+import threading
+import logging
+import re
+import os
+
+# 'hybrid' answers confident cases locally and asks the LLM otherwise; 'llm' always asks; 'local' never does
+INTENT_CLASSIFIER_MODE = os.getenv('INTENT_CLASSIFIER_MODE', 'hybrid')
+# Nearest-neighbour answers need at least this cosine similarity to the closest example ...
+INTENT_NN_THRESHOLD = float(os.getenv('INTENT_NN_THRESHOLD', 0.6))
+# ... and this much lead over the closest example with a different label
+INTENT_NN_MARGIN = float(os.getenv('INTENT_NN_MARGIN', 0.05))
+
+KEYWORD_RULES = {
+    'EDIT': [
+        r"\binstead of\b", r"\breschedule\b",
+        r"\bmove\b", r"\bchange\b", r"\bupdate\b", r"\bmodify\b", r"\bpush (it |this |that )?(back|forward)\b",
+        r"\bpostpone\b", r"\bshift\b", r"\bmake (it|the \w+) (longer|shorter)\b", r"\bswitch\b",
+        r"\badd (?!.*\bcalendar\b)\w+ to (the|my|our|this|that)\b",
+        r"\bremove (?!.*\bcalendar\b).+ from (the|my|our|this|that)\b",
+    ],
+    'DELETE': [
+        # The verb must act on the event itself ("cancel my dinner", "delete it"), not on whatever follows it
+        r"\b(cancel|delete|remove|scrap)\b(?=\s*$|\s+(it|this|that|my|the|our|all|everything|today|tonight|tomorrow|\w+'s)\b"
+        r"|\s+(meeting|event|appointment|call|session|class|lunch|dinner|plans?)\b)",
+        r"\bclear (my|the|out)\b", r"\bget rid of\b", r"\bcan'?t make it\b",
+        r"\bnot attending\b", r"\bdon'?t want to go\b", r"\btake (it |this |that )?off my calendar\b",
+    ],
+    'CREATE': [
+        r"^(let'?s|lets)\b", r"\bschedule\b", r"\bbook\b", r"\bset up\b", r"\bcreate\b", r"\bplan\b",
+        r"\badd (a|an|my)\b", r"\bput (a|an)\b", r"\bmeet\b", r"\bremind me\b",
+    ],
+}
+
+# Removing or clearing one of these is an edit of the event, so a DELETE keyword hit is not trusted
+FIELD_EDIT_RE = re.compile(
+    r"\b(remove|delete|clear|cancel|drop|get rid of|take)\b.*\b(location|description|agenda|notes?|link|zoom|teams|"
+    r"meet link|title|reminders?|attendees?|guests?|invitees?|invite|room|address|details|video|dial-in|attachments?)\b"
+)
+# A delete verb next to another action ("cancel dinner and book lunch instead") is a compound request,
+# usually a move; a DELETE keyword hit is not trusted then, whichever labels the classifier knows
+COMPOUND_ACTION_RE = re.compile(r"\b(add|move|schedule|reschedule|book|put|replace|create|set up)\b|\binstead\b")
+# Phrases that mean an edit even when the request also reads like a new event
+EDIT_OVERRIDE_RE = re.compile(r"\binstead of\b|\breschedule\b|\bpostpone\b")
+# A request that opens with one of these is a new event, even if its title says "update", "move" or "change"
+CREATE_LEAD_RE = re.compile(r"^(please |can you )?(schedule|book|set up|create|plan|add (a|an|my)|put (a|an)|remind me)\b")
+
+# Examples taken from the agents' system prompts, plus a few more of each kind
+INTENT_EXAMPLES = [
+    ("Let's have coffee tomorrow", 'CREATE'), ("let's meet tomorrow", 'CREATE'), ("schedule a call", 'CREATE'),
+    ("add a meeting", 'CREATE'), ("book a gym session", 'CREATE'), ("drink with connor on wednesday", 'CREATE'),
+    ("lunch with sam friday at noon", 'CREATE'), ("dentist appointment next tuesday at 3pm", 'CREATE'),
+    ("study session tonight for two hours", 'CREATE'), ("dinner with family on sunday", 'CREATE'),
+    ("Cancel my dentist appointment", 'DELETE'), ("cancel meeting", 'DELETE'), ("remove appointment", 'DELETE'),
+    ("I can't make it to the team sync", 'DELETE'), ("Delete the lunch meeting", 'DELETE'),
+    ("Move my meeting to 3pm", 'EDIT'), ("Let's do dinner Wednesday instead of tomorrow", 'EDIT'),
+    ("reschedule to Wednesday", 'EDIT'), ("change the time", 'EDIT'), ("Push back the doctor's appointment by 1 hour", 'EDIT'),
+    ("What's the weather like?", 'UNKNOWN'), ("tell me a joke", 'UNKNOWN'), ("who won the game last night", 'UNKNOWN'),
+    ("what is the capital of france", 'UNKNOWN'),
+]
+
+EDIT_OR_DELETE_EXAMPLES = [
+    ("Cancel my meeting with John", 'DELETE'), ("Remove tomorrow's dentist appointment", 'DELETE'),
+    ("I can't make it to the team sync", 'DELETE'), ("Delete the lunch meeting", 'DELETE'),
+    ("Clear my calendar for Friday", 'DELETE'), ("I don't want to go anymore", 'DELETE'),
+    ("take this off my calendar", 'DELETE'), ("not attending", 'DELETE'),
+    ("Move my 2pm call to 4pm", 'EDIT'), ("Change the location of tonight's dinner", 'EDIT'),
+    ("Add Sarah to the project review", 'EDIT'), ("Make the meeting 30 minutes longer", 'EDIT'),
+    ("Update the zoom link for the standup", 'EDIT'), ("Push back the doctor's appointment by 1 hour", 'EDIT'),
+    ("Change this to a virtual meeting", 'EDIT'), ("make it an hour earlier", 'EDIT'),
+    ("remove the location", 'EDIT'), ("clear the description", 'EDIT'), ("remove jennifer from the invite", 'EDIT'),
+    ("drop the zoom link and use teams", 'EDIT'),
+]
+
+
+class IntentClassifier:
+    """
+    Local intent classification in front of the LLM. Keyword rules decide when exactly one
+    label's rules fire; otherwise the query is compared with labelled examples embedded by the
+    search engine's MiniLM model. Returns None when neither is confident, so the caller can
+    fall back to the LLM.
+    """
+
+    def __init__(self, examples, labels, mode=INTENT_CLASSIFIER_MODE,
+                 threshold=INTENT_NN_THRESHOLD, margin=INTENT_NN_MARGIN, embed=None):
+        self.examples = examples
+        self.labels = labels
+        self.mode = mode
+        self.threshold = threshold
+        self.margin = margin
+        self._embed = embed
+        self._rules = {
+            label: [re.compile(pattern) for pattern in KEYWORD_RULES.get(label, [])]
+            for label in labels
+        }
+        self._example_vectors = None
+        self._lock = threading.Lock()
+        self.counts = {'keyword': 0, 'neighbour': 0, 'llm': 0}
+
+    def keyword_intent(self, query):
+        text = ' '.join(query.lower().replace('’', "'").split())
+        matched = [label for label, patterns in self._rules.items() if any(p.search(text) for p in patterns)]
+        # "remove the location" edits the event; deleting it on a keyword would lose the user's data
+        if 'DELETE' in matched and FIELD_EDIT_RE.search(text):
+            return None
+        # "remove my dinner from friday and add it to saturday" must not delete on a keyword either
+        if 'DELETE' in matched and COMPOUND_ACTION_RE.search(text):
+            return None
+        if 'EDIT' in matched and 'CREATE' in matched:
+            if EDIT_OVERRIDE_RE.search(text):
+                matched.remove('CREATE')
+            elif CREATE_LEAD_RE.match(text):
+                # "schedule a project update meeting": the edit word is part of the new event's title
+                matched.remove('EDIT')
+            else:
+                return None
+        return matched[0] if len(matched) == 1 else None
+
+    def _embedder(self):
+        # embed=False turns the neighbour stage off, any other value replaces the search engine's model
+        if self._embed is False:
+            return None
+        if self._embed is not None:
+            return self._embed
+        from search_engine import search_engine
+        # Never block a request on model loading; the LLM answers until the index has warmed up
+        return search_engine.embed_query if search_engine.ready else None
+
+    def neighbour_intent(self, query):
+        embed = self._embedder()
+        if embed is None:
+            return None
+        try:
+            with self._lock:
+                if self._example_vectors is None:
+                    self._example_vectors = [embed(text) for text, _ in self.examples]
+            vector = embed(query)
+        except Exception as e:
+            logging.warning(f"Intent embedding failed: {str(e)}")
+            return None
+
+        # Best similarity per label; vectors are normalized so the dot product is the cosine
+        best = {}
+        for (_, label), example in zip(self.examples, self._example_vectors):
+            score = sum(a * b for a, b in zip(vector, example))
+            best[label] = max(best.get(label, -1.0), score)
+        ranked = sorted(best.items(), key=lambda item: -item[1])
+        top_label, top_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+        if top_score >= self.threshold and top_score - runner_up >= self.margin:
+            return top_label
+        return None
+
+    def classify(self, query):
+        """Returns (label, source) with source 'keyword' or 'neighbour', or (None, 'llm') to defer."""
+        if self.mode != 'llm':
+            label = self.keyword_intent(query)
+            if label is not None:
+                self.counts['keyword'] += 1
+                return label, 'keyword'
+            label = self.neighbour_intent(query)
+            if label is not None or self.mode == 'local':
+                self.counts['neighbour'] += 1
+                return label or 'UNKNOWN', 'neighbour'
+        self.counts['llm'] += 1
+        return None, 'llm'
@@ -0,0 +1,194 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import threading
+import logging
+import uuid
+import time
+import os
+
+from pipeline import STAGE_LABELS
+
+# Scheduling requests processed at once
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+# Requests allowed to wait for a worker before new ones are turned away with 429
+JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', 32))
+# Finished jobs are kept this long for status lookups, and at most this many of them
+JOB_TTL_SECONDS = float(os.getenv('JOB_TTL_SECONDS', 600))
+JOB_MAX_FINISHED = int(os.getenv('JOB_MAX_FINISHED', 256))
+# Idle job event streams send a keep-alive comment this often so proxies don't close them
+JOB_EVENTS_KEEPALIVE_SECONDS = float(os.getenv('JOB_EVENTS_KEEPALIVE_SECONDS', 15))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """One background request: its state, the stage it is in, its result and timing."""
+
+    def __init__(self, key=None, owner=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        # User who submitted the job; only they may read it
+        self.owner = owner
+        self.state = 'queued'  # queued -> running -> done | failed
+        self.stage = 'Queued...'
+        self.message = 'Waiting for a free worker...'
+        self.stages = {}
+        self.timings = {}
+        self.response = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Bumped on every change so watchers (the SSE stream) can wait for the next one
+        self.version = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    @property
+    def complete(self):
+        return self.state in ('done', 'failed')
+
+    def report_stage(self, name, state, seconds):
+        """PipelineContext callback: records the stage and shows the earliest one still running."""
+        with self._lock:
+            self.stages[name] = {'state': state, 'seconds': seconds}
+            running = [stage for stage, info in self.stages.items() if info['state'] == 'started']
+            if running:
+                self.stage, self.message = STAGE_LABELS.get(running[0], (running[0], ''))
+            self._touch()
+
+    def _touch(self):
+        # Caller holds self._lock
+        self.version += 1
+        self._changed.notify_all()
+
+    def wait_for_change(self, version, timeout):
+        """Blocks until the job changes past `version` or timeout seconds pass; returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self):
+        with self._lock:
+            now = time.time()
+            status = {
+                'job_id': self.id,
+                'version': self.version,
+                'state': self.state,
+                'stage': self.stage,
+                'message': self.message,
+                'complete': self.complete,
+                'response': self.response,
+                'stages': dict(self.stages),
+                'timings': dict(self.timings),
+                'queued_seconds': round((self.started_at or now) - self.created_at, 4),
+                'run_seconds': round((self.finished_at or now) - self.started_at, 4) if self.started_at else None
+            }
+            if self.error is not None:
+                status['error'] = self.error
+            return status
+
+
+class JobManager:
+    """
+    Runs jobs on a fixed pool of worker threads. Submissions beyond the workers plus
+    queue_limit raise QueueFull so the caller can answer 429. Finished jobs are evicted
+    after ttl_seconds, or least recently used first once more than max_finished remain.
+    A key (e.g. user + query) maps to its in-flight job so duplicate submissions share it.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT,
+                 ttl_seconds=JOB_TTL_SECONDS, max_finished=JOB_MAX_FINISHED):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit(self, fn, *args, key=None, owner=None):
+        """Queues fn(job, *args) and returns the Job; returns the existing job for a key already in flight."""
+        with self._lock:
+            self._evict()
+            if key is not None and key in self._keys:
+                job = self._jobs.get(self._keys[key])
+                if job is not None:
+                    return job
+            pending = sum(1 for job in self._jobs.values() if not job.complete)
+            if pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise QueueFull(f"{pending} jobs already pending")
+            job = Job(key, owner)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._keys[key] = job.id
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        with job._lock:
+            job.state = 'running'
+            job.started_at = time.time()
+            job.stage, job.message = 'Starting...', 'Initializing request...'
+            job._touch()
+        try:
+            response = fn(job, *args)
+            with job._lock:
+                job.response = response
+                job.finished_at = time.time()
+                job.state = 'done'
+                job.stage, job.message = 'Done', 'Your request has been processed.'
+                job._touch()
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed")
+            with job._lock:
+                job.error = str(e)
+                job.finished_at = time.time()
+                job.state = 'failed'
+                job.stage, job.message = 'Failed', 'Something went wrong while processing your request.'
+                job._touch()
+
+    def get(self, job_id, owner=None):
+        """The job, or None when it is unknown, expired or belongs to someone other than owner."""
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            if job is not None and job.owner != owner:
+                return None
+            if job is not None:
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def release(self, key):
+        """Forgets the key's job so the same key starts a fresh job next time; the job stays readable by id."""
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def _evict(self):
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.complete]
+        expired = [job for job in finished if now - job.finished_at > self.ttl_seconds]
+        # _jobs is in least recently used order, so the front of `finished` goes first
+        overflow = finished[:max(0, len(finished) - self.max_finished)]
+        for job in expired + overflow:
+            if self._jobs.pop(job.id, None) is not None and self._keys.get(job.key) == job.id:
+                del self._keys[job.key]
+
+    def stats(self):
+        with self._lock:
+            self._evict()
+            states = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                'workers': self.workers,
+                'queue_limit': self.queue_limit,
+                'jobs': len(self._jobs),
+                'states': states,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,115 @@
+from collections import Counter
+import math
+import re
+import threading
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Question and filler words that carry no signal for calendar lookups
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'at', 'do', 'does', 'event', 'for', 'have', 'i', 'in', 'is', 'me',
+    'meeting', 'my', 'of', 'on', 'the', 'to', 'what', 'whats', 'when', 'where', 'which', 'who',
+    'with', 'you'
+}
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+def query_terms(text):
+    return [term for term in dict.fromkeys(tokenize(text)) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring over event documents."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs = {}  # doc id -> {'text', 'metadata', 'length'}
+        self._postings = {}  # term -> {doc id: term frequency}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, text, metadata=None):
+        with self._lock:
+            self._remove(doc_id)
+            term_freqs = Counter(tokenize(text))
+            for term, freq in term_freqs.items():
+                self._postings.setdefault(term, {})[doc_id] = freq
+            length = sum(term_freqs.values())
+            self._docs[doc_id] = {'text': text, 'metadata': metadata or {}, 'length': length, 'terms': list(term_freqs)}
+            self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._docs = {}
+            self._postings = {}
+            self._total_length = 0
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in doc['terms']:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= doc['length']
+
+    def get(self, doc_id):
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return None
+        return doc['text'], doc['metadata']
+
+    def find(self, doc_filter):
+        """Returns (doc_id, metadata) for every document whose metadata passes doc_filter."""
+        with self._lock:
+            return [(doc_id, doc['metadata']) for doc_id, doc in self._docs.items() if doc_filter(doc['metadata'])]
+
+    def search(self, query_text, k=10, doc_filter=None):
+        """
+        Returns up to k (doc_id, score, matched_terms) tuples, best first.
+        doc_filter, if given, is called with a document's metadata and must return True to keep it.
+        """
+        terms = query_terms(query_text)
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or n_docs == 0:
+                return []
+            avg_length = self._total_length / n_docs
+            scores = {}
+            matched = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, freq in postings.items():
+                    doc = self._docs[doc_id]
+                    if doc_filter is not None and not doc_filter(doc['metadata']):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * doc['length'] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+                    matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(doc_id, score, matched[doc_id]) for doc_id, score in ranked]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuses several ranked id lists into one, scoring each id by sum(1 / (k + rank))."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return [doc_id for doc_id, _ in sorted(scores.items(), key=lambda item: item[1], reverse=True)]
@@ -0,0 +1,64 @@
+from dotenv import load_dotenv
+import threading
+import os
+
+load_dotenv()
+
+# Total time allowed for one completion, and for opening a connection
+GROQ_TIMEOUT_SECONDS = float(os.getenv('GROQ_TIMEOUT_SECONDS', 30))
+GROQ_CONNECT_TIMEOUT_SECONDS = float(os.getenv('GROQ_CONNECT_TIMEOUT_SECONDS', 5))
+# Keep-alive pool shared by every agent, so requests reuse TLS connections
+GROQ_MAX_CONNECTIONS = int(os.getenv('GROQ_MAX_CONNECTIONS', 20))
+GROQ_MAX_KEEPALIVE = int(os.getenv('GROQ_MAX_KEEPALIVE', 10))
+# Completions in flight at once across the process; callers beyond this wait their turn
+GROQ_MAX_CONCURRENCY = int(os.getenv('GROQ_MAX_CONCURRENCY', 8))
+GROQ_MAX_RETRIES = int(os.getenv('GROQ_MAX_RETRIES', 2))
+
+_client = None
+_client_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(GROQ_MAX_CONCURRENCY)
+
+
+def get_client():
+    """The process-wide Groq client, built on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                from groq import Groq
+                _client = Groq(
+                    api_key=os.getenv('GROQ_API_KEY'),
+                    max_retries=GROQ_MAX_RETRIES,
+                    http_client=httpx.Client(
+                        timeout=httpx.Timeout(GROQ_TIMEOUT_SECONDS, connect=GROQ_CONNECT_TIMEOUT_SECONDS),
+                        limits=httpx.Limits(
+                            max_connections=GROQ_MAX_CONNECTIONS,
+                            max_keepalive_connections=GROQ_MAX_KEEPALIVE
+                        )
+                    )
+                )
+    return _client
+
+
+def chat_completion(**kwargs):
+    """client.chat.completions.create(**kwargs), limited to GROQ_MAX_CONCURRENCY calls at once."""
+    client = get_client()
+    with _slots:
+        return client.chat.completions.create(**kwargs)
+
+
+def stream_chat_completion(**kwargs):
+    """
+    Yields the completion's text as it is generated (stream=True). The concurrency slot is
+    held until the stream is exhausted or the generator is closed.
+    """
+    client = get_client()
+    with _slots:
+        stream = client.chat.completions.create(stream=True, **kwargs)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
@@ -0,0 +1,135 @@
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+import numpy as np
+import threading
+import os
+import logging
+
+
+def _missing(error, purpose):
+    # Name the packages the ONNX backend needs instead of surfacing a bare import failure
+    return ImportError(
+        f"EMBEDDING_BACKEND=onnx needs {purpose} ({error.name or error}); "
+        f"install onnxruntime, onnx, tokenizers, transformers and torch (see requirements.txt)"
+    )
+
+
+class OnnxEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Sentence-transformers compatible embeddings served by ONNX Runtime.
+
+    On first use the Hugging Face model is exported to ONNX and dynamically quantized to int8
+    under `model_dir`; later runs load the exported files directly. Outputs are mean-pooled and
+    L2-normalized like all-MiniLM-L6-v2, so vectors live in the same space as the existing collection.
+    """
+
+    def __init__(self, model_name="all-MiniLM-L6-v2", model_dir=None, quantize=True,
+                 batch_size=32, max_length=256, num_threads=None):
+        self.model_name = model_name
+        self.model_dir = model_dir or os.path.join('.chronos', 'onnx', model_name)
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self._lock = threading.Lock()
+
+        model_path = self._ensure_model()
+
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise _missing(e, 'onnxruntime and tokenizers to run the model') from e
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self._session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, 'tokenizer.json'))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding(pad_id=0, pad_token='[PAD]')
+        logging.info(f"Loaded ONNX embedding model from {model_path}")
+
+    @property
+    def cache_name(self):
+        """Model identity for embedding caches; int8 vectors differ slightly from the PyTorch ones."""
+        return f"{self.model_name}/onnx{'-int8' if self.quantize else ''}"
+
+    def _ensure_model(self):
+        fp32_path = os.path.join(self.model_dir, 'model.onnx')
+        int8_path = os.path.join(self.model_dir, 'model.int8.onnx')
+
+        if not os.path.exists(fp32_path) or not os.path.exists(os.path.join(self.model_dir, 'tokenizer.json')):
+            self._export(fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+        if not os.path.exists(int8_path):
+            try:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+            except ImportError as e:
+                raise _missing(e, 'onnx to quantize the exported model') from e
+            logging.info(f"Quantizing {fp32_path} to int8")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        return int8_path
+
+    def _export(self, fp32_path):
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError as e:
+            raise _missing(e, 'torch and transformers to export the model on first run') from e
+
+        logging.info(f"Exporting sentence-transformers/{self.model_name} to ONNX")
+        os.makedirs(self.model_dir, exist_ok=True)
+        hub_name = f"sentence-transformers/{self.model_name}"
+        tokenizer = AutoTokenizer.from_pretrained(hub_name)
+        model = AutoModel.from_pretrained(hub_name)
+        model.eval()
+
+        sample = tokenizer(["export sample"], return_tensors='pt')
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in sample.keys()}
+        dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in sample.keys()),
+                fp32_path,
+                input_names=list(sample.keys()),
+                output_names=['last_hidden_state'],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        tokenizer.backend_tokenizer.save(os.path.join(self.model_dir, 'tokenizer.json'))
+
+    def _embed_batch(self, texts):
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            feeds['token_type_ids'] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        with self._lock:
+            token_embeddings = self._session.run(['last_hidden_state'], feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        texts = list(input)
+        if not texts:
+            return []
+
+        # Dynamic batching: group texts of similar length so each batch pads as little as possible
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            batch_vectors = self._embed_batch([texts[i] for i in batch_indices])
+            for i, vector in zip(batch_indices, batch_vectors):
+                vectors[i] = vector.astype(np.float32)
+        return vectors
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+import threading
+import time
+import os
+
+# Threads shared by all requests for the independent intent / rules / availability / contacts stages
+STAGE_WORKERS = int(os.getenv('SCHEDULER_STAGE_WORKERS', 8))
+
+_stage_pool = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='schedule-stage')
+
+# (stage, message) shown to the user while a stage runs
+STAGE_LABELS = {
+    'intent': ('Classifying intent...', 'Determining if this is a create, edit, or delete request...'),
+    'rules': ('Processing preferences...', 'Analyzing your calendar preferences...'),
+    'availability': ('Checking calendar...', 'Looking up your availability...'),
+    'contacts': ('Looking up contacts...', 'Finding the people mentioned in your request...'),
+    'solver': ('Finding a time...', 'Picking slots that fit your preferences and calendar...'),
+    'llm': ('Drafting events...', 'Writing up the event details...'),
+    'create': ('Creating events...', 'Adding events to your calendar...'),
+}
+
+
+class PipelineContext:
+    """
+    Scope for one scheduling request. Each named stage runs at most once per context,
+    whoever asks for it first; later callers get the same result (or exception).
+    on_stage(name, state, seconds) is called with state 'started' and then 'done' or 'failed'.
+    """
+
+    def __init__(self, on_stage=None):
+        self.on_stage = on_stage
+        self.timings = {}
+        self.started = time.perf_counter()
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _claim(self, name):
+        """Returns (future, owner): owner is True when the caller must run the stage."""
+        with self._lock:
+            future = self._futures.get(name)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._futures[name] = future
+            return future, True
+
+    def _execute(self, future, name, fn, args, kwargs):
+        self._notify(name, 'started', None)
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.timings[name] = round(time.perf_counter() - started, 4)
+            self._notify(name, 'failed', self.timings[name])
+            future.set_exception(e)
+            return
+        self.timings[name] = round(time.perf_counter() - started, 4)
+        self._notify(name, 'done', self.timings[name])
+        future.set_result(result)
+
+    def _notify(self, name, state, seconds):
+        if self.on_stage is None:
+            return
+        try:
+            self.on_stage(name, state, seconds)
+        except Exception as e:
+            print(f"Stage callback failed for {name}: {str(e)}")
+
+    def run(self, name, fn, *args, **kwargs):
+        """Runs the stage in this thread (or waits for the thread already running it) and returns its result."""
+        future, owner = self._claim(name)
+        if owner:
+            self._execute(future, name, fn, args, kwargs)
+        return future.result()
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Starts the stage on the shared pool unless it already ran; returns a Future."""
+        future, owner = self._claim(name)
+        if owner:
+            _stage_pool.submit(self._execute, future, name, fn, args, kwargs)
+        return future
+
+    def elapsed(self):
+        return round(time.perf_counter() - self.started, 4)
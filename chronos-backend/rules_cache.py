@@ -0,0 +1,60 @@
+from caching import PersistentLRUCache
+import threading
+import hashlib
+import logging
+import json
+import os
+
+from common import DATA_DIR
+from slot_solver import parse_rules
+
+RULES_CACHE_SIZE = int(os.getenv('RULES_CACHE_SIZE', 256))
+RULES_CACHE_PATH = os.getenv('RULES_CACHE_PATH', os.path.join(DATA_DIR, 'preference_rules.json'))
+
+
+def normalize_preferences(preferences):
+    """Order, case and spacing don't change the compiled rules."""
+    return sorted({' '.join(pref.lower().split()) for pref in preferences if pref and pref.strip()})
+
+
+class RulesCache:
+    """
+    Compiled PreferencesAgent rules, keyed by a hash of the normalized preference list plus
+    the prompt and model that compiled them, so editing either invalidates old entries.
+    Persisted to disk so a restart does not recompile every user's preferences.
+    """
+
+    def __init__(self, path=RULES_CACHE_PATH, max_size=RULES_CACHE_SIZE):
+        self._entries = PersistentLRUCache(path, max_size)
+        self._lock = threading.Lock()
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def key(preferences, system_prompt, model):
+        payload = json.dumps([normalize_preferences(preferences), system_prompt, model])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            self.saved_seconds += entry['latency']
+        return entry['rules']
+
+    def store(self, key, rules, latency):
+        """Caches rules that parse to at least one rule; returns False for a reply not worth keeping."""
+        if not parse_rules(rules):
+            # Prose or broken JSON would otherwise stick across restarts until the preferences change
+            logging.warning("Not caching preference rules that did not parse")
+            return False
+        self._entries.put(key, {'rules': rules, 'latency': latency})
+        return True
+
+    def stats(self):
+        stats = self._entries.stats()
+        stats['saved_seconds'] = round(self.saved_seconds, 3)
+        return stats
+
+
+rules_cache = RulesCache()
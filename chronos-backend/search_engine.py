@@ -1,7 +1,13 @@
-import chromadb
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+from caching import LRUCache
+from lexical_index import BM25Index, query_terms, reciprocal_rank_fusion
+from time_parser import extract_time_window
+from startup import startup_profile
+from common import DATA_DIR, DEFAULT_TENANT, event_time_to_epoch
+from collections import OrderedDict
 from datetime import datetime
 import dotenv
+import hashlib
+import threading
 import uuid
 import os
 import logging
@@ -10,108 +16,573 @@ logging.basicConfig(level=logging.INFO)
 
 dotenv.load_dotenv()
 
+# 'incremental' only touches documents whose fingerprint changed, 'full' wipes and rebuilds the collection
+SYNC_MODE = os.getenv('CHROMA_SYNC_MODE', 'incremental')
+# 'event' stores one document per Google event id, 'chunk' joins 10 events per document
+INDEX_MODE = os.getenv('CHROMA_INDEX_MODE', 'event')
+CHUNK_SIZE = 10
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# 'torch' runs sentence-transformers, 'onnx' runs the same model through ONNX Runtime (int8 unless ONNX_QUANTIZE=0)
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')
+ONNX_QUANTIZE = os.getenv('ONNX_QUANTIZE', '1') != '0'
+# 'cloud' talks to Chroma Cloud over HTTPS, 'local' runs an in-process persistent store under DATA_DIR
+CHROMA_BACKEND = os.getenv('CHROMA_BACKEND', 'cloud')
+# Number of vectors kept in the on-disk embedding cache; 0 disables it
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 20000))
+# A keyword hit is answered without a query embedding when it matches every query term
+# and outscores the runner-up by at least this factor
+LEXICAL_FAST_PATH_RATIO = float(os.getenv('LEXICAL_FAST_PATH_RATIO', 1.5))
+# In-memory LRU sizes for query embeddings and for search results of the current index version
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', 1024))
+SEARCH_RESULT_CACHE_SIZE = int(os.getenv('SEARCH_RESULT_CACHE_SIZE', 512))
+# Users whose keyword index and result cache stay in memory; others reload from their collection on next use
+SEARCH_MAX_TENANTS = int(os.getenv('SEARCH_MAX_TENANTS', 100))
+
+# The single-account setup (DEFAULT_TENANT) keeps its original collection name
+COLLECTION_NAME = 'calendar_events'
+
+
+class TenantIndex:
+    """
+    One user's slice of the index: a Chroma collection of their own, plus the keyword
+    index, version and search-result cache built from it. Syncs, searches and deletions
+    only ever touch this user's documents.
+    """
+
+    def __init__(self, engine, tenant_id):
+        self.engine = engine
+        self.tenant_id = tenant_id
+        self.collection = None
+        self.lexical_index = BM25Index()
+        # Bumped whenever a sync changes the index; cached search results are only valid for one version
+        self.index_version = 0
+        self.search_result_cache = LRUCache(SEARCH_RESULT_CACHE_SIZE)
+        # Serializes the final reconcile step of overlapping syncs
+        self.sync_lock = threading.Lock()
+        # Optional EventStore; when set, time-window candidates come from its interval index
+        self.event_store = None
+        self._lock = threading.Lock()
+
+    @property
+    def collection_name(self):
+        if self.tenant_id == DEFAULT_TENANT:
+            return COLLECTION_NAME
+        return f"{COLLECTION_NAME}_{self.tenant_id}"
+
+    def ensure_loaded(self):
+        """Opens this user's collection and fills the keyword index from it, once."""
+        if self.collection is not None:
+            return
+        self.engine.ensure_initialized()
+        with self._lock:
+            if self.collection is not None:
+                return
+            collection = self.engine.client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=self.engine.embedder
+            )
+            existing = collection.get(include=['documents', 'metadatas'])
+            self.lexical_index.clear()
+            for doc_id, text, metadata in zip(existing['ids'], existing['documents'], existing['metadatas']):
+                self.lexical_index.add(doc_id, text or '', metadata)
+            logging.info(f"Loaded {len(self.lexical_index)} documents into the keyword index for '{self.tenant_id}'")
+            self.collection = collection
+
+    def bump_version(self):
+        self.index_version += 1
+        self.search_result_cache.clear()
+
+
 class SearchEngine:
+    """
+    Chroma-backed event index, partitioned into one TenantIndex per user. Nothing heavy
+    happens at construction: the Chroma client and embedding model are created on first
+    use or by warm_up(), and each user's collection when they first sync or search.
+    """
+
     def __init__(self):
         self.client = None
         self.embedder = None
-        self.collection = None
-        self.initialize()
+        # Query vectors depend only on the text, so every user shares them
+        self.query_embedding_cache = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+        self._tenants = OrderedDict()
+        self._tenants_lock = threading.Lock()
+        # Optional callable tenant_id -> EventStore or None, so a TenantIndex rebuilt after
+        # eviction gets its user's interval index back
+        self.event_store_for = None
+        self.status = 'idle'  # idle -> warming -> ready, or failed (retried on next use)
+        self.error = None
+        self._init_lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    def warm_up(self):
+        """Starts initialization on a background thread so the first request does not pay for it."""
+        thread = threading.Thread(target=self._warm_up, name='search-engine-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up(self):
+        try:
+            self.ensure_initialized()
+            with startup_profile.step('keyword index'):
+                self.tenant(DEFAULT_TENANT).ensure_loaded()
+        except Exception:
+            pass  # already logged; the next request retries
+
+    def ensure_initialized(self):
+        if self.status == 'ready':
+            return
+        with self._init_lock:
+            if self.status == 'ready':
+                return
+            self.status = 'warming'
+            try:
+                self.initialize()
+                self.status = 'ready'
+                self.error = None
+            except Exception as e:
+                self.status = 'failed'
+                self.error = str(e)
+                raise
 
     def initialize(self):
         try:
-            logging.info(f"Initializing ChromaDB version: {chromadb.__version__}")
-            self.client = chromadb.HttpClient(
-                ssl=True,
-                host='api.trychroma.com',
-                tenant=os.getenv('CHROMA_TENANT_KEY'),
-                database='Chronos',
-                headers={
-                    'x-chroma-token': os.getenv('CHROMA_API_KEY')
-                }
-            )
+            with startup_profile.step('import chromadb'):
+                import chromadb
+                from embedding_cache import EmbeddingCache, CachedEmbeddingFunction
+
+            logging.info(f"Initializing ChromaDB version: {chromadb.__version__} ({CHROMA_BACKEND} backend)")
+            with startup_profile.step('chroma client'):
+                self.client = self._create_client(chromadb)
             
             # Test the connection and log server version
-            heartbeat = self.client.heartbeat()
+            with startup_profile.step('chroma heartbeat'):
+                heartbeat = self.client.heartbeat()
             logging.info(f"Connected to ChromaDB server. Heartbeat: {heartbeat}")
             
-            self.embedder = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-            self.collection = self.client.get_or_create_collection(
-                name="calendar_events",
-                embedding_function=self.embedder
-            )
+            with startup_profile.step('embedding model'):
+                self.embedder, cache_name = self._create_embedder()
+            if EMBEDDING_CACHE_MAX_ENTRIES > 0:
+                with startup_profile.step('embedding cache'):
+                    cache = EmbeddingCache(
+                        os.path.join(DATA_DIR, 'embedding_cache'),
+                        max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+                    )
+                self.embedder = CachedEmbeddingFunction(self.embedder, cache_name, cache)
             logging.info("Successfully initialized ChromaDB connection")
         except Exception as e:
             logging.error(f"Failed to initialize ChromaDB: {str(e)}")
             raise
 
-    def update_events_in_chroma(self, events):
+    def _create_embedder(self):
+        """Returns the embedding function and the model identity used to key the embedding cache."""
+        if EMBEDDING_BACKEND == 'onnx':
+            from onnx_embedder import OnnxEmbeddingFunction
+            embedder = OnnxEmbeddingFunction(
+                model_name=EMBEDDING_MODEL,
+                model_dir=os.path.join(DATA_DIR, 'onnx', EMBEDDING_MODEL),
+                quantize=ONNX_QUANTIZE
+            )
+            return embedder, embedder.cache_name
+        if EMBEDDING_BACKEND != 'torch':
+            raise ValueError(f"Unknown EMBEDDING_BACKEND '{EMBEDDING_BACKEND}', expected 'torch' or 'onnx'")
+        from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+        return SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL), EMBEDDING_MODEL
+
+    def _create_client(self, chromadb):
+        if CHROMA_BACKEND == 'local':
+            return chromadb.PersistentClient(path=os.getenv('CHROMA_PATH', os.path.join(DATA_DIR, 'chroma')))
+        if CHROMA_BACKEND != 'cloud':
+            raise ValueError(f"Unknown CHROMA_BACKEND '{CHROMA_BACKEND}', expected 'cloud' or 'local'")
+        return chromadb.HttpClient(
+            ssl=True,
+            host='api.trychroma.com',
+            tenant=os.getenv('CHROMA_TENANT_KEY'),
+            database='Chronos',
+            headers={
+                'x-chroma-token': os.getenv('CHROMA_API_KEY')
+            }
+        )
+
+    def tenant(self, tenant_id=DEFAULT_TENANT):
+        """The TenantIndex for a user; cheap to call, the collection is opened on first sync or search."""
+        with self._tenants_lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                tenant = TenantIndex(self, tenant_id)
+                if self.event_store_for is not None:
+                    tenant.event_store = self.event_store_for(tenant_id)
+                self._tenants[tenant_id] = tenant
+            self._tenants.move_to_end(tenant_id)
+            while len(self._tenants) > SEARCH_MAX_TENANTS:
+                self._tenants.popitem(last=False)
+            return tenant
+
+    def delete_tenant(self, tenant_id):
+        """Drops a user's collection and in-memory indexes; other users are untouched."""
+        self.ensure_initialized()
+        with self._tenants_lock:
+            tenant = self._tenants.pop(tenant_id, None)
+        name = tenant.collection_name if tenant is not None else TenantIndex(self, tenant_id).collection_name
         try:
-            existing = self.collection.get()
-            if existing and existing['ids']:
-                self.collection.delete(ids=existing['ids'])
-                logging.info(f"Cleared {len(existing['ids'])} existing events from collection")
+            self.client.delete_collection(name=name)
+        except Exception as e:
+            # Nothing was ever indexed for this user
+            logging.warning(f"Could not delete collection '{name}': {str(e)}")
+            return False
+        logging.info(f"Deleted search index for '{tenant_id}'")
+        return True
 
-            CHUNK_SIZE = 10
-            documents = []
-            metadatas = []
-            ids = []
-            
-            for i in range(0, len(events), CHUNK_SIZE):
-                chunk = events[i:i + CHUNK_SIZE]
-                chunk_text = ""
-                
-                for event in chunk:
-                    try:
-                        event_text = stringify_event(event)
-                        chunk_text += event_text + " "
-                    except Exception as e:
-                        logging.error(f"Error processing event: {str(e)}")
-                        continue
-                
-                if chunk_text:
-                    chunk_id = f"chunk_{i//CHUNK_SIZE}"
-                    documents.append(chunk_text)
-                    metadatas.append({
-                        "idx": i//CHUNK_SIZE,
-                        "size": len(chunk),
-                        "ts": datetime.now().strftime("%Y%m%d")
-                    })
-                    ids.append(chunk_id)
-
-            if documents:
-                self.collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
-                logging.info(f"Added {len(documents)} chunks containing {len(events)} events to collection")
+    def begin_sync(self, calendar_id='primary', tenant_id=DEFAULT_TENANT):
+        """Starts a streaming sync of one user's index; feed it events page by page and call finish() at the end."""
+        return IndexSync(self.tenant(tenant_id), calendar_id)
 
-            return True
+    def update_events_in_chroma(self, events, calendar_id='primary', tenant_id=DEFAULT_TENANT):
+        try:
+            sync = self.begin_sync(calendar_id, tenant_id)
+            sync.add_events(events)
+            return sync.finish()
 
         except Exception as e:
             logging.error(f"Error in update_events_in_chroma: {str(e)}")
             return False
 
-    def search_events(self, query_text, n_results=5):
+    def _build_event_documents(self, events, calendar_id):
+        documents = []
+
+        for event in events:
+            if 'id' not in event:
+                continue
+            try:
+                event_text = stringify_event(event)
+                documents.append({
+                    'id': event['id'],
+                    'text': event_text,
+                    'metadata': event_metadata(event, calendar_id, event_text)
+                })
+            except Exception as e:
+                logging.error(f"Error processing event {event.get('id')}: {str(e)}")
+                continue
+
+        return documents
+
+    def _build_chunk_documents(self, events, first_chunk_idx=0):
+        documents = []
+
+        for i in range(0, len(events), CHUNK_SIZE):
+            chunk = events[i:i + CHUNK_SIZE]
+            chunk_idx = first_chunk_idx + i // CHUNK_SIZE
+            chunk_text = ""
+            fingerprints = []
+
+            for event in chunk:
+                try:
+                    event_text = stringify_event(event)
+                    chunk_text += event_text + " "
+                    fingerprints.append(event_fingerprint(event, event_text))
+                except Exception as e:
+                    logging.error(f"Error processing event: {str(e)}")
+                    continue
+
+            if chunk_text:
+                documents.append({
+                    'id': f"chunk_{chunk_idx}",
+                    'text': chunk_text,
+                    'metadata': {
+                        "idx": chunk_idx,
+                        "size": len(chunk),
+                        "ts": datetime.now().strftime("%Y%m%d"),
+                        "fp": hashlib.sha1('|'.join(fingerprints).encode('utf-8')).hexdigest()
+                    }
+                })
+
+        return documents
+
+    def embed_query(self, query_text):
+        """Embeds a search query, reusing the vector for queries seen before."""
+        key = ' '.join(query_text.lower().split())
+        embedding = self.query_embedding_cache.get(key)
+        if embedding is None:
+            self.ensure_initialized()
+            embedding = [float(value) for value in self.embedder([query_text])[0]]
+            self.query_embedding_cache.put(key, embedding)
+        return embedding
+
+    def cache_stats(self, tenant_id=DEFAULT_TENANT):
+        tenant = self.tenant(tenant_id)
+        return {
+            'index_version': tenant.index_version,
+            'query_embeddings': self.query_embedding_cache.stats(),
+            'search_results': tenant.search_result_cache.stats(),
+            'tenants_loaded': len(self._tenants)
+        }
+
+    def search_events(self, query_text, n_results=5, tenant_id=DEFAULT_TENANT):
         try:
-            results = self.collection.query(
-                query_texts=[query_text],
-                n_results=n_results
+            tenant = self.tenant(tenant_id)
+            tenant.ensure_loaded()
+            window = extract_time_window(query_text) if INDEX_MODE != 'chunk' else None
+            # The window is part of the key because "tomorrow" resolves differently each day
+            cache_key = (
+                ' '.join(query_text.lower().split()),
+                n_results,
+                tenant.index_version,
+                (window.start.timestamp(), window.end.timestamp()) if window else None
             )
+            results = tenant.search_result_cache.get(cache_key)
+            if results is None:
+                results = self._search(tenant, query_text, n_results, window)
+                tenant.search_result_cache.put(cache_key, results)
             return results
         except Exception as e:
             logging.error(f"Error in search_events: {str(e)}")
             return None
 
-# Create a singleton instance
+    def _search(self, tenant, query_text, n_results, window):
+        where, doc_filter, lexical_query = None, None, query_text
+        if window is not None:
+            start_ts, end_ts = int(window.start.timestamp()), int(window.end.timestamp())
+            # Keep events that overlap [start_ts, end_ts)
+            where = {"$and": [{"start_ts": {"$lt": end_ts}}, {"end_ts": {"$gt": start_ts}}]}
+            in_window_ids = None
+            if tenant.event_store is not None:
+                in_window_ids = tenant.event_store.ids_between(start_ts, end_ts)
+                candidates = set(in_window_ids)
+                doc_filter = lambda metadata: metadata.get('event_id') in candidates
+            else:
+                doc_filter = lambda metadata: (
+                    metadata.get('start_ts', end_ts) < end_ts and metadata.get('end_ts', start_ts) > start_ts
+                )
+            lexical_query = window.remainder
+            logging.info(f"Restricting '{query_text}' to {window.start.isoformat()} - {window.end.isoformat()}")
+
+            if not query_terms(lexical_query):
+                # Pure time question ("what do I have tomorrow"): list the window chronologically
+                if in_window_ids is None:
+                    in_window = sorted(tenant.lexical_index.find(doc_filter), key=lambda hit: hit[1].get('start_ts', 0))
+                    in_window_ids = [doc_id for doc_id, _ in in_window]
+                return self._format_results(tenant, in_window_ids, limit=n_results)
+
+        lexical_hits = tenant.lexical_index.search(lexical_query, k=n_results * 4, doc_filter=doc_filter)
+        if self._is_confident_keyword_hit(lexical_query, lexical_hits):
+            logging.info(f"Answered '{query_text}' from the keyword index")
+            return self._format_results(tenant, [hit[0] for hit in lexical_hits[:n_results]])
+
+        vector_results = tenant.collection.query(
+            query_embeddings=[self.embed_query(query_text)],
+            n_results=n_results * 4,
+            where=where
+        )
+        if not lexical_hits:
+            return self._trim_results(vector_results, n_results)
+
+        vector_ids = vector_results['ids'][0]
+        vector_distances = dict(zip(vector_ids, vector_results['distances'][0]))
+        vector_docs = {
+            doc_id: (text, metadata)
+            for doc_id, text, metadata in zip(
+                vector_ids, vector_results['documents'][0], vector_results['metadatas'][0]
+            )
+        }
+        fused_ids = reciprocal_rank_fusion([vector_ids, [hit[0] for hit in lexical_hits]])[:n_results]
+        return self._format_results(tenant, fused_ids, vector_docs, vector_distances)
+
+    def _is_confident_keyword_hit(self, query_text, lexical_hits):
+        if not lexical_hits:
+            return False
+        top_id, top_score, top_matched = lexical_hits[0]
+        if top_matched < len(query_terms(query_text)):
+            return False
+        if len(lexical_hits) == 1:
+            return True
+        return top_score >= LEXICAL_FAST_PATH_RATIO * lexical_hits[1][1]
+
+    def _format_results(self, tenant, ids, vector_docs=None, vector_distances=None, limit=None):
+        """Builds a Chroma-style query result for ids drawn from the vector and/or keyword index."""
+        vector_docs = vector_docs or {}
+        vector_distances = vector_distances or {}
+        documents, metadatas, distances, found_ids = [], [], [], []
+        for doc_id in ids:
+            if limit is not None and len(found_ids) >= limit:
+                break
+            doc = vector_docs.get(doc_id) or tenant.lexical_index.get(doc_id)
+            if doc is None:
+                continue
+            found_ids.append(doc_id)
+            documents.append(doc[0])
+            metadatas.append(doc[1])
+            distances.append(vector_distances.get(doc_id))
+        return {
+            'ids': [found_ids],
+            'documents': [documents],
+            'metadatas': [metadatas],
+            'distances': [distances]
+        }
+
+    @staticmethod
+    def _trim_results(results, n_results):
+        return {
+            key: [value[0][:n_results]] if value else value
+            for key, value in results.items()
+            if key in ('ids', 'documents', 'metadatas', 'distances')
+        }
+
+class IndexSync:
+    """
+    One sync of a user's event index, fed page by page. Each add_events() call embeds and
+    upserts only new or changed documents; finish() deletes documents that were not
+    seen during the sync and returns added/updated/removed counts.
+
+    Syncs of the same user may overlap (two /api/events requests), so finish() reconciles
+    against the collection as it is then, not the snapshot taken at the start: documents
+    another sync removed in the meantime are put back if this sync saw them.
+    """
+
+    def __init__(self, tenant, calendar_id='primary'):
+        tenant.ensure_loaded()
+        self.tenant = tenant
+        self.engine = tenant.engine
+        self.calendar_id = calendar_id
+        self.stats = {'added': 0, 'updated': 0, 'removed': 0}
+        self.event_count = 0
+        self.failed = False
+        # Every document this sync saw, by id, so finish() can restore ones removed concurrently
+        self._seen_docs = {}
+        self._pending_chunk = []
+        self._next_chunk_idx = 0
+
+        if SYNC_MODE == 'full':
+            existing = tenant.collection.get(include=[])
+            if existing and existing['ids']:
+                tenant.collection.delete(ids=existing['ids'])
+                logging.info(f"Cleared {len(existing['ids'])} existing events from '{tenant.collection_name}'")
+            tenant.lexical_index.clear()
+            self.stats['removed'] = len(existing['ids']) if existing else 0
+            self._existing_fps = {}
+        else:
+            existing = tenant.collection.get(include=['metadatas'])
+            self._existing_fps = {
+                doc_id: (metadata or {}).get('fp')
+                for doc_id, metadata in zip(existing['ids'], existing['metadatas'])
+            }
+
+    def add_events(self, events):
+        try:
+            self.event_count += len(events)
+            if INDEX_MODE == 'chunk':
+                # Only complete chunks are indexed mid-stream so chunk boundaries do not depend on page size
+                self._pending_chunk.extend(events)
+                ready = len(self._pending_chunk) // CHUNK_SIZE * CHUNK_SIZE
+                batch, self._pending_chunk = self._pending_chunk[:ready], self._pending_chunk[ready:]
+                documents = self.engine._build_chunk_documents(batch, self._next_chunk_idx)
+                self._next_chunk_idx += ready // CHUNK_SIZE
+            else:
+                documents = self.engine._build_event_documents(events, self.calendar_id)
+            self._apply(documents)
+        except Exception:
+            self.failed = True
+            raise
+
+    def _apply(self, documents):
+        changed = [doc for doc in documents if self._existing_fps.get(doc['id']) != doc['metadata']['fp']]
+        added = sum(1 for doc in changed if doc['id'] not in self._existing_fps)
+        self._seen_docs.update((doc['id'], doc) for doc in documents)
+
+        self._upsert(changed)
+        self.stats['added'] += added
+        self.stats['updated'] += len(changed) - added
+
+    def _upsert(self, documents):
+        tenant = self.tenant
+        if documents:
+            tenant.collection.upsert(
+                documents=[doc['text'] for doc in documents],
+                metadatas=[doc['metadata'] for doc in documents],
+                ids=[doc['id'] for doc in documents]
+            )
+        for doc in documents:
+            tenant.lexical_index.add(doc['id'], doc['text'], doc['metadata'])
+
+    def finish(self, remove_stale=True):
+        """
+        Reconciles with the live collection and returns the stats. remove_stale=False keeps
+        documents this sync did not see, for when it was fed an incomplete set of events.
+        """
+        if self.failed:
+            # Never delete on a partial sync: unseen documents may simply not have been fetched
+            raise RuntimeError("Index sync failed part-way; skipped removal of stale documents")
+        tenant = self.tenant
+        if self._pending_chunk:
+            self._apply(self.engine._build_chunk_documents(self._pending_chunk, self._next_chunk_idx))
+            self._pending_chunk = []
+
+        with tenant.sync_lock:
+            live_ids = tenant.collection.get(include=[])['ids']
+            # A sync that finished after this one started may have removed documents seen here as unchanged
+            live = set(live_ids)
+            restored = [doc for doc_id, doc in self._seen_docs.items() if doc_id not in live]
+            self._upsert(restored)
+            self.stats['added'] += len(restored)
+
+            removed_ids = [doc_id for doc_id in live_ids if doc_id not in self._seen_docs] if remove_stale else []
+            if removed_ids:
+                tenant.collection.delete(ids=removed_ids)
+            for doc_id in removed_ids:
+                tenant.lexical_index.remove(doc_id)
+            self.stats['removed'] += len(removed_ids)
+
+            if self.stats['added'] or self.stats['updated'] or self.stats['removed']:
+                tenant.bump_version()
+        self.stats['index_version'] = tenant.index_version
+        logging.info(
+            f"Synced {self.event_count} events for '{tenant.tenant_id}': {self.stats['added']} added, "
+            f"{self.stats['updated']} updated, {self.stats['removed']} removed"
+        )
+        return self.stats
+
+# Create a singleton instance (lazy: call warm_up() or let the first request initialize it)
 search_engine = SearchEngine()
 
 # Export the methods to maintain backwards compatibility
-def update_events_in_chroma(events):
-    return search_engine.update_events_in_chroma(events)
+def update_events_in_chroma(events, calendar_id='primary', tenant_id=DEFAULT_TENANT):
+    return search_engine.update_events_in_chroma(events, calendar_id, tenant_id)
+
+def search_events(query_text, n_results=5, tenant_id=DEFAULT_TENANT):
+    return search_engine.search_events(query_text, n_results, tenant_id)
+
+def begin_index_sync(calendar_id='primary', tenant_id=DEFAULT_TENANT):
+    return search_engine.begin_sync(calendar_id, tenant_id)
+
+def event_fingerprint(event, event_text=None):
+    """Hash of an event's id, revision (updated/etag) and indexed text."""
+    if event_text is None:
+        event_text = stringify_event(event)
+    revision = event.get('updated') or event.get('etag') or ''
+    payload = f"{event.get('id', '')}|{revision}|{event_text}"
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
 
-def search_events(query_text, n_results=5):
-    return search_engine.search_events(query_text, n_results)
+def event_metadata(event, calendar_id='primary', event_text=None):
+    """Structured Chroma metadata for a single event document (values must be scalars)."""
+    metadata = {
+        "event_id": event['id'],
+        "calendar_id": calendar_id,
+        "attendees": ','.join(
+            attendee['email'] for attendee in event.get('attendees', []) if 'email' in attendee
+        ),
+        "recurring": bool(event.get('recurrence') or event.get('recurringEventId')),
+        "fp": event_fingerprint(event, event_text)
+    }
+    start_ts = event_time_to_epoch(event.get('start'))
+    end_ts = event_time_to_epoch(event.get('end'))
+    if start_ts is not None:
+        metadata["start_ts"] = start_ts
+    if end_ts is not None:
+        metadata["end_ts"] = end_ts
+    return metadata
 
 def stringify_event(event):
     parts = []
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+import threading
+import hashlib
+import secrets
+import logging
+import json
+import time
+import os
+
+from common import DATA_DIR, DEFAULT_TENANT
+
+# Signed-in users whose clients stay cached, and how long an unused one is kept
+SESSION_MAX_USERS = int(os.getenv('SESSION_MAX_USERS', 100))
+SESSION_IDLE_SECONDS = float(os.getenv('SESSION_IDLE_SECONDS', 1800))
+# Per-user OAuth tokens
+TOKEN_DIR = os.getenv('TOKEN_DIR', os.path.join(DATA_DIR, 'tokens'))
+# Server-side map from browser session tokens to users
+SESSION_TOKENS_PATH = os.getenv('SESSION_TOKENS_PATH', os.path.join(DATA_DIR, 'sessions.json'))
+
+# Single-account setup: requests without a signed-in user act as DEFAULT_USER (token.json). Off by
+# default, so an anonymous request is refused rather than run against that account
+SINGLE_USER_MODE = os.getenv('CHRONOS_SINGLE_USER', '0') == '1'
+DEFAULT_USER = DEFAULT_TENANT
+
+
+def user_id_for_account(account_email):
+    """
+    Stable id for a Google account that does not put the address in file names. It names the
+    user's files and index, but anyone can compute it, so it never identifies a browser session.
+    """
+    return hashlib.sha256(account_email.strip().lower().encode('utf-8')).hexdigest()[:16]
+
+
+def token_path(user_id):
+    if user_id == DEFAULT_USER:
+        return 'token.json'
+    return os.path.join(TOKEN_DIR, f'{user_id}.json')
+
+
+def user_data_dir(user_id):
+    if user_id == DEFAULT_USER:
+        return DATA_DIR
+    return os.path.join(DATA_DIR, 'users', user_id)
+
+
+class SessionTokens:
+    """
+    Random tokens handed to browsers at sign-in, mapped to user ids on the server. The cookie
+    carries only the token, so knowing someone's user id is not enough to act as them. Only a
+    hash of each token is written to path, so signed-in browsers survive a restart without the
+    file itself being usable as credentials. path=None keeps the map in memory.
+    """
+
+    def __init__(self, path=SESSION_TOKENS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._users = self._load()
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read session tokens, every browser must sign in again: {str(e)}")
+            return {}
+
+    def _save(self):
+        # Caller holds self._lock
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._users, f)
+        os.replace(tmp_path, self.path)
+
+    def issue(self, user_id):
+        """A new token for user_id, to be stored in the browser's session."""
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._users[self._digest(token)] = user_id
+            self._save()
+        return token
+
+    def resolve(self, token):
+        """The user a token was issued to, or None for a missing, unknown or revoked token."""
+        if not token:
+            return None
+        with self._lock:
+            return self._users.get(self._digest(token))
+
+    def revoke(self, token):
+        if not token:
+            return
+        with self._lock:
+            if self._users.pop(self._digest(token), None) is not None:
+                self._save()
+
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+
+class SessionRegistry:
+    """
+    Per-user objects (credentials, Google service clients, agents) built once by factory(user_id)
+    and reused across requests. Construction happens under a per-user lock, so concurrent first
+    requests build one instance without blocking other users. Entries idle for longer than
+    idle_seconds are dropped, and the least recently used ones once there are more than max_users.
+    """
+
+    def __init__(self, factory, max_users=SESSION_MAX_USERS, idle_seconds=SESSION_IDLE_SECONDS):
+        self.factory = factory
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.built = 0
+        self.evicted = 0
+
+    def _entry(self, user_id):
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = _Entry()
+                self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            entry.last_used = time.time()
+            return entry
+
+    def get(self, user_id):
+        entry = self._entry(user_id)
+        with entry.lock:
+            if entry.value is None:
+                entry.value = self.factory(user_id)
+                self.built += 1
+            return entry.value
+
+    def peek(self, user_id):
+        """The user's object if one is built, without building it or refreshing its expiry."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        return entry.value if entry is not None else None
+
+    def put(self, user_id, value):
+        entry = self._entry(user_id)
+        with entry.lock:
+            entry.value = value
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _evict(self):
+        now = time.time()
+        for user_id in [uid for uid, entry in self._entries.items() if now - entry.last_used > self.idle_seconds]:
+            del self._entries[user_id]
+            self.evicted += 1
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self):
+        with self._lock:
+            self._evict()
+            return {
+                'users': len(self._entries),
+                'max_users': self.max_users,
+                'idle_seconds': self.idle_seconds,
+                'built': self.built,
+                'evicted': self.evicted
+            }
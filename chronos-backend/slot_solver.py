@@ -0,0 +1,290 @@
+from datetime import datetime, timedelta
+import pytz
+import json
+import re
+import os
+
+from freebusy import DAY_START_HOUR, DAY_END_HOUR
+from time_parser import extract_time_window
+
+DEFAULT_TIMEZONE = 'America/Los_Angeles'
+STEP_MINUTES = 15
+DEFAULT_DURATION_MINUTES = int(os.getenv('SOLVER_DEFAULT_DURATION_MINUTES', 60))
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Coarse activity families so "drinks with connor" matches a "socialize" rule
+ACTIVITY_FAMILIES = {
+    'work': {'work', 'call', 'calls', 'meeting', 'meetings', 'sync', 'standup', 'review', 'interview',
+             'client', 'demo', 'planning', '1:1', 'office'},
+    'social': {'social', 'socialize', 'socializing', 'drink', 'drinks', 'dinner', 'party', 'partying',
+               'hangout', 'hang', 'coffee', 'beer', 'beers', 'friends', 'date', 'brunch', 'lunch'},
+    'exercise': {'exercise', 'gym', 'workout', 'run', 'running', 'yoga', 'swim', 'climb', 'climbing', 'sports'},
+    'focus': {'focus', 'deep', 'study', 'studying', 'homework', 'reading', 'writing'},
+}
+
+# "no_meetings", "avoid calls", "not working": the rule keeps that activity out of its window
+_NEGATION_RE = re.compile(r"^(no|not|avoid|never|without|don'?t)\s+")
+# A negated rule naming no particular activity ("no events") applies to everything
+_GENERIC_ACTIVITIES = {'event', 'events', 'plan', 'plans', 'anything', 'appointment', 'appointments', 'booking', 'bookings'}
+
+_DURATION_RE = re.compile(
+    r'\b(?:for\s+)?(half an hour|an hour and a half|an hour|(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m))\b'
+)
+
+
+def parse_rules(rules):
+    """Accepts PreferencesAgent output (JSON text, possibly wrapped in prose or markdown) or a dict."""
+    if isinstance(rules, dict):
+        return rules.get('rules', [])
+    if not rules:
+        return []
+    text = rules.strip()
+    if "```" in text:
+        text = text.split("```")[1]
+        if text.startswith('json'):
+            text = text[4:]
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        return []
+    try:
+        return json.loads(match.group(0)).get('rules', [])
+    except (json.JSONDecodeError, AttributeError):
+        return []
+
+
+def extract_duration_minutes(text, default=DEFAULT_DURATION_MINUTES):
+    match = _DURATION_RE.search(text.lower())
+    if not match:
+        return default
+    phrase = match.group(1)
+    if phrase == 'half an hour':
+        return 30
+    if phrase == 'an hour':
+        return 60
+    if phrase == 'an hour and a half':
+        return 90
+    amount, unit = float(match.group(2)), match.group(3)
+    return int(round(amount * 60)) if unit.startswith('h') else int(round(amount))
+
+
+def _tokens(text):
+    # Crude singularization so "calls" matches "call"
+    return {token.rstrip('s') if len(token) > 3 else token
+            for token in re.findall(r'[a-z0-9:]+', text.lower().replace('_', ' '))}
+
+
+def _families(text):
+    words = set(re.findall(r'[a-z0-9:]+', text.lower().replace('_', ' ')))
+    return {family for family, members in ACTIVITY_FAMILIES.items() if words & members}
+
+
+def negated_activity(activity):
+    """The activity a negated rule excludes ("no_meetings" -> "meetings"), or None for a rule that is not negated."""
+    text = ' '.join(activity.lower().replace('_', ' ').split())
+    match = _NEGATION_RE.match(text)
+    return text[match.end():] if match else None
+
+
+def rule_match(rule, action_query):
+    """
+    'exact' when the rule names this activity, 'family' when it is a related one, else None.
+    A negated rule ("no_meetings") is matched on the activity it excludes.
+    """
+    activity = rule.get('activity', '')
+    excluded = negated_activity(activity)
+    if excluded is not None:
+        if not set(excluded.split()) - _GENERIC_ACTIVITIES:
+            return 'exact'
+        activity = excluded
+    if _tokens(activity) & _tokens(action_query) - {'with', 'and', 'the'}:
+        return 'exact'
+    if _families(activity) & _families(action_query):
+        return 'family'
+    return None
+
+
+def _parse_clock(value, default):
+    try:
+        hours, minutes = value.split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        return default
+
+
+class SlotSolver:
+    """
+    Finds meeting slots on a 15-minute grid over a horizon, with each constraint compiled to a
+    bitmask (bit i = slot i). Feasible starts for a k-slot meeting are the bits of
+    free & free >> 1 & ... & free >> (k - 1), so a two-week search is a handful of integer ops.
+    """
+
+    def __init__(self, rules, busy, start_ts, end_ts, timezone=DEFAULT_TIMEZONE,
+                 day_start_hour=DAY_START_HOUR, day_end_hour=DAY_END_HOUR):
+        self.tz = pytz.timezone(timezone)
+        step = STEP_MINUTES * 60
+        # Align the grid to the next quarter hour so slots start on clean times
+        self.start_ts = -(-start_ts // step) * step
+        self.n_slots = max(0, (end_ts - self.start_ts) // step)
+        self.end_ts = self.start_ts + self.n_slots * step
+        self.rules = rules
+        self.all_mask = (1 << self.n_slots) - 1
+        self.working_mask = self._daily_mask(day_start_hour * 60, day_end_hour * 60, WEEKDAYS)
+        self.busy_mask = 0
+        for busy_start, busy_end in busy:
+            self.busy_mask |= self._range_mask(busy_start, busy_end)
+
+    def _slot_index(self, ts):
+        return (ts - self.start_ts) // (STEP_MINUTES * 60)
+
+    def _range_mask(self, start_ts, end_ts):
+        """Bits for every slot overlapping [start_ts, end_ts)."""
+        first = max(0, self._slot_index(start_ts))
+        last = min(self.n_slots, -(-(end_ts - self.start_ts) // (STEP_MINUTES * 60)))
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+
+    def _daily_mask(self, start_minute, end_minute, days):
+        """Bits for [start_minute, end_minute) local time on the given weekdays; wraps past midnight."""
+        days = {day.lower() for day in days}
+        mask = 0
+        first_day = datetime.fromtimestamp(self.start_ts, self.tz).date() - timedelta(days=1)
+        last_day = datetime.fromtimestamp(self.start_ts + self.n_slots * STEP_MINUTES * 60, self.tz).date()
+        day = first_day
+        while day <= last_day:
+            if WEEKDAYS[day.weekday()] in days:
+                midnight = datetime(day.year, day.month, day.day)
+                end = end_minute if end_minute > start_minute else end_minute + 24 * 60
+                window_start = int(self.tz.localize(midnight + timedelta(minutes=start_minute)).timestamp())
+                window_end = int(self.tz.localize(midnight + timedelta(minutes=end)).timestamp())
+                mask |= self._range_mask(window_start, window_end)
+            day += timedelta(days=1)
+        return mask
+
+    def _rule_mask(self, rule):
+        days = rule.get('days') or WEEKDAYS
+        start_minute = _parse_clock(rule.get('start_time'), 0)
+        end_minute = _parse_clock(rule.get('end_time'), 24 * 60)
+        if end_minute == start_minute:
+            end_minute = start_minute + 24 * 60
+        return self._daily_mask(start_minute, end_minute, days)
+
+    def compile(self, action_query, window=None):
+        """Returns (allowed_mask, preferred_masks) for this request."""
+        allowed = self.all_mask & ~self.busy_mask
+        preferred = []
+        restriction = None
+        for rule in self.rules:
+            rule_mask = self._rule_mask(rule)
+            match = rule_match(rule, action_query)
+            if negated_activity(rule.get('activity', '')) is not None:
+                if match and rule.get('blocking'):
+                    # "No meetings on Fridays": this activity is kept out of the window, nothing else is
+                    allowed &= ~rule_mask
+                elif match:
+                    # "Avoid calls before 10am": slots outside the window rank higher
+                    preferred.append(self.all_mask & ~rule_mask)
+            elif match == 'exact' and rule.get('blocking'):
+                # "I only take work calls between 6am and 4pm": this activity must fall inside the rule
+                restriction = (restriction or 0) | rule_mask
+            elif rule.get('blocking'):
+                # Time blocked off for another activity, even a related one: Wednesday's party leaves no room for drinks
+                allowed &= ~rule_mask
+            elif match:
+                preferred.append(rule_mask)
+        # A rule only narrows the working day; "calls between 6am and 4pm" still starts at DAY_START_HOUR
+        allowed &= self.working_mask
+        if restriction is not None:
+            allowed &= restriction
+        if window is not None:
+            allowed &= self._range_mask(int(window[0]), int(window[1]))
+        return allowed, preferred
+
+    def find_slots(self, action_query, duration_minutes=DEFAULT_DURATION_MINUTES, window=None, count=3):
+        """Best `count` (start_ts, end_ts) slots: slots matching the most preference rules first, then earliest."""
+        allowed, preferred = self.compile(action_query, window)
+        k = max(1, -(-duration_minutes // STEP_MINUTES))
+        starts = allowed
+        for shift in range(1, k):
+            starts &= allowed >> shift
+
+        candidates = []
+        while starts:
+            low = starts & -starts
+            i = low.bit_length() - 1
+            starts ^= low
+            span = ((1 << k) - 1) << i
+            # Every preference rule the slot satisfies adds to its score
+            score = sum(bin(span & mask).count('1') for mask in preferred)
+            candidates.append((-score, i))
+        candidates.sort()
+
+        # Offer distinct options rather than the same slot shifted by 15 minutes
+        chosen = []
+        for _, i in candidates:
+            if all(abs(i - j) >= k for j in chosen):
+                chosen.append(i)
+                if len(chosen) == count:
+                    break
+
+        step = STEP_MINUTES * 60
+        return [(self.start_ts + i * step, self.start_ts + i * step + duration_minutes * 60) for i in chosen]
+
+    def is_allowed(self, action_query, start_ts, end_ts):
+        allowed, _ = self.compile(action_query)
+        span = self._range_mask(start_ts, end_ts)
+        return span != 0 and span & allowed == span
+
+
+def solve(action_query, rules, busy, horizon_days=14, now=None, timezone=DEFAULT_TIMEZONE, count=3):
+    """
+    Candidate slots for a scheduling request: the time window comes from the query
+    ("on wednesday", "tomorrow afternoon"), the duration from "for 30 minutes" style phrases.
+    When the window itself has no room, the rest of the requested day is tried.
+    Returns (solver, duration_minutes, slots).
+    """
+    tz = pytz.timezone(timezone)
+    now = now or datetime.now(tz)
+    solver = SlotSolver(parse_rules(rules), busy, int(now.timestamp()),
+                        int((now + timedelta(days=horizon_days)).timestamp()), timezone)
+    duration = extract_duration_minutes(action_query)
+    window = extract_time_window(action_query, now=now, timezone=timezone)
+    bounds = (window.start.timestamp(), window.end.timestamp()) if window else None
+    slots = solver.find_slots(action_query, duration, bounds, count)
+    if not slots and window is not None:
+        # "tomorrow morning" is fully booked: the afternoon still honours the day the user asked for
+        first_day = window.start.date()
+        last_day = (window.end - timedelta(seconds=1)).date()
+        day_bounds = (tz.localize(datetime(first_day.year, first_day.month, first_day.day)).timestamp(),
+                      tz.localize(datetime(last_day.year, last_day.month, last_day.day) + timedelta(days=1)).timestamp())
+        if day_bounds != bounds:
+            slots = solver.find_slots(action_query, duration, day_bounds, count)
+    return solver, duration, slots
+
+
+def event_from_slot(action_query, slot, timezone=DEFAULT_TIMEZONE):
+    """A ready-to-insert event for the solver's pick, titled from the query minus its time phrase."""
+    tz = pytz.timezone(timezone)
+    window = extract_time_window(action_query, timezone=timezone)
+    title = _DURATION_RE.sub('', window.remainder if window else action_query)
+    words = title.split()
+    # "drink with connor on wednesday" leaves a dangling "on"
+    while words and words[-1] in ('on', 'at', 'for', 'by', 'this', 'next', 'in'):
+        words.pop()
+    title = ' '.join(words) or action_query
+    return {
+        'summary': title[0].upper() + title[1:],
+        'description': action_query,
+        'start': {'dateTime': datetime.fromtimestamp(slot[0], tz).isoformat(), 'timeZone': timezone},
+        'end': {'dateTime': datetime.fromtimestamp(slot[1], tz).isoformat(), 'timeZone': timezone},
+        'reminders': {'useDefault': True}
+    }
+
+
+def format_candidates(slots, timezone=DEFAULT_TIMEZONE):
+    tz = pytz.timezone(timezone)
+    return '\n'.join(
+        f"- {datetime.fromtimestamp(start, tz).isoformat()} to {datetime.fromtimestamp(end, tz).isoformat()}"
+        for start, end in slots
+    )
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+import threading
+import time
+import os
+import logging
+
+# Total time the process may spend in imports and init steps before it is flagged as over budget
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', 3.0))
+
+
+class StartupProfile:
+    """Records how long each import and initialization step takes, relative to process start."""
+
+    def __init__(self, budget_seconds=STARTUP_BUDGET_SECONDS):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.time()
+        self._steps = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._steps.append({
+                    'step': name,
+                    'seconds': round(duration, 4),
+                    'thread': threading.current_thread().name,
+                    'error': error
+                })
+            logging.info(f"Startup step '{name}' took {duration * 1000:.1f}ms")
+
+    def report(self):
+        with self._lock:
+            steps = list(self._steps)
+        total = sum(step['seconds'] for step in steps)
+        return {
+            'steps': steps,
+            'total_seconds': round(total, 4),
+            'budget_seconds': self.budget_seconds,
+            'over_budget': total > self.budget_seconds,
+            'uptime_seconds': round(time.time() - self.started_at, 1)
+        }
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,89 @@
+import threading
+
+from calendar_sync import CalendarSync
+from event_store import EventStore
+
+
+def event(event_id, day):
+    return {'id': event_id, 'summary': event_id,
+            'start': {'dateTime': f'2026-10-{day:02d}T10:00:00-07:00'},
+            'end': {'dateTime': f'2026-10-{day:02d}T11:00:00-07:00'}}
+
+
+class FakeEvents:
+    """events().list(...).execute() over fixed pages; a syncToken request returns `deltas`."""
+
+    def __init__(self, pages, deltas=None):
+        self.pages = pages
+        self.deltas = deltas or []
+        self.requests = []
+
+    def list(self, **params):
+        self.requests.append(params)
+        if params.get('syncToken'):
+            response = {'items': self.deltas, 'nextSyncToken': 'token-2'}
+        else:
+            index = int(params.get('pageToken') or 0)
+            response = {'items': self.pages[index]}
+            if index + 1 < len(self.pages):
+                response['nextPageToken'] = str(index + 1)
+            else:
+                response['nextSyncToken'] = 'token-1'
+        return type('Request', (), {'execute': lambda self: response})()
+
+
+class FakeService:
+    def __init__(self, events):
+        self._events = events
+
+    def events(self):
+        return self._events
+
+
+def test_full_then_incremental_sync():
+    events = FakeEvents([[event('a', 20), event('b', 21)], [event('c', 22)]],
+                        deltas=[{'id': 'b', 'status': 'cancelled'}, event('d', 23)])
+    sync = CalendarSync(FakeService(events), store=EventStore())
+
+    assert sync.sync() == {'mode': 'full', 'changed': 3, 'removed': 0}
+    assert sync.sync_token == 'token-1'
+    assert sync.sync() == {'mode': 'incremental', 'changed': 1, 'removed': 1}
+    assert sorted(sync.store.all_ids()) == ['a', 'c', 'd']
+
+
+def test_reads_are_not_blocked_by_a_slow_full_sync_consumer():
+    events = FakeEvents([[event('a', 20)], [event('b', 21)]])
+    sync = CalendarSync(FakeService(events), store=EventStore())
+
+    pages = sync.iter_pages()
+    assert [e['id'] for e in next(pages)] == ['a']
+
+    # The streaming caller is paused between pages; another caller must still get an answer
+    done = threading.Event()
+    threading.Thread(target=lambda: (sync.ensure_fresh(), done.set()), daemon=True).start()
+    assert done.wait(2)
+
+    assert [e['id'] for e in next(pages)] == ['b']
+    assert list(pages) == []
+    assert sync.last_sync['mode'] == 'full'
+    assert sorted(sync.store.all_ids()) == ['a', 'b']
+
+
+def test_pages_read_during_another_full_sync_are_flagged_incomplete():
+    events = FakeEvents([[event('a', 20)], [event('b', 21)]])
+    sync = CalendarSync(FakeService(events), store=EventStore())
+
+    streaming = {}
+    pages = sync.iter_pages(streaming)
+    next(pages)
+    assert streaming == {'complete': True}
+
+    # 'b' has not been fetched yet, so this caller must not treat its pages as the whole calendar
+    reader = {}
+    assert [e['id'] for page in sync.iter_pages(reader) for e in page] == ['a']
+    assert reader == {'complete': False}
+
+    list(pages)
+    after = {}
+    assert [e['id'] for page in sync.iter_pages(after) for e in page] == ['a', 'b']
+    assert after == {'complete': True}
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip('chromadb')
+from embedding_cache import EmbeddingCache  # noqa: E402
+
+
+def vec(value, dim=4):
+    return np.full(dim, value, dtype=np.float32)
+
+
+def test_puts_append_to_the_log_and_survive_a_reload(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=8)
+    cache.put_many({'a': vec(1)})
+    snapshot = os.path.getmtime(cache.index_path), os.path.getsize(cache.index_path)
+    cache.put_many({'b': vec(2)})
+    cache.put_many({'c': vec(3)})
+
+    # Later puts only append to the log; the snapshot is left alone
+    assert (os.path.getmtime(cache.index_path), os.path.getsize(cache.index_path)) == snapshot
+    assert cache._log_lines == 2
+
+    reloaded = EmbeddingCache(str(tmp_path), max_entries=8)
+    assert len(reloaded) == 3
+    found = reloaded.get_many(['a', 'b', 'c'])
+    assert [float(found[key][0]) for key in 'abc'] == [1.0, 2.0, 3.0]
+
+
+def test_evicted_keys_stay_evicted_after_a_reload(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put_many({'a': vec(1)})
+    cache.put_many({'b': vec(2)})
+    cache.put_many({'c': vec(3)})  # reuses a's row
+
+    reloaded = EmbeddingCache(str(tmp_path), max_entries=2)
+    assert set(reloaded.get_many(['a', 'b', 'c'])) == {'b', 'c'}
+    assert float(reloaded.get_many(['c'])['c'][0]) == 3.0
+
+
+def test_log_is_compacted_into_the_snapshot(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=4)
+    cache.MIN_COMPACT_LINES = 2
+    for i in range(6):
+        cache.put_many({f'k{i}': vec(i)})
+    assert cache._log_lines <= 4
+
+    reloaded = EmbeddingCache(str(tmp_path), max_entries=4)
+    assert set(reloaded.get_many([f'k{i}' for i in range(6)])) == {'k2', 'k3', 'k4', 'k5'}
+
+
+def test_torn_log_line_is_ignored(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=4)
+    cache.put_many({'a': vec(1)})
+    cache.put_many({'b': vec(2)})
+    with open(cache.log_path, 'a') as f:
+        f.write('["c", ')
+
+    reloaded = EmbeddingCache(str(tmp_path), max_entries=4)
+    assert set(reloaded.get_many(['a', 'b', 'c'])) == {'a', 'b'}
+
+    # Entries written after the torn line are not lost behind it
+    reloaded.put_many({'d': vec(4)})
+    again = EmbeddingCache(str(tmp_path), max_entries=4)
+    assert set(again.get_many(['a', 'b', 'd'])) == {'a', 'b', 'd'}
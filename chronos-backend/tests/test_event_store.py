@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from event_store import EventStore
+
+
+def event(event_id, start, end):
+    return {
+        'id': event_id,
+        'summary': event_id,
+        'start': {'dateTime': f'2026-10-14T{start}:00-07:00'},
+        'end': {'dateTime': f'2026-10-14T{end}:00-07:00'},
+    }
+
+
+def ts(clock):
+    return int(datetime.fromisoformat(f'2026-10-14T{clock}:00-07:00').timestamp())
+
+
+@pytest.fixture(params=['rtree', 'btree'])
+def store(request):
+    store = EventStore(':memory:')
+    # Exercise the B-tree fallback query on the same schema
+    store._has_rtree = request.param == 'rtree'
+    store.upsert_events([
+        event('standup', '09:00', '09:15'),
+        event('lunch', '12:00', '13:00'),
+        event('review', '12:30', '14:00'),
+        event('late', '18:00', '19:00'),
+    ])
+    return store
+
+
+def test_range_query_returns_overlapping_events_in_start_order(store):
+    assert store.ids_between(ts('12:15'), ts('13:30')) == ['lunch', 'review']
+    assert [e['summary'] for e in store.events_between(ts('08:00'), ts('10:00'))] == ['standup']
+
+
+def test_range_query_is_half_open(store):
+    # An event ending exactly at the window start, or starting at its end, does not overlap
+    assert store.ids_between(ts('09:15'), ts('12:00')) == []
+    assert store.ids_between(ts('14:00'), ts('18:00')) == []
+
+
+def test_upsert_moves_event_and_delete_removes_it(store):
+    store.upsert_events([event('late', '07:00', '08:00')])
+    assert store.ids_between(ts('18:00'), ts('19:00')) == []
+    assert store.ids_between(ts('06:00'), ts('08:30')) == ['late']
+    assert store.count() == 4
+
+    store.delete_events(['lunch', 'missing'])
+    assert store.ids_between(ts('12:00'), ts('13:00')) == ['review']
+    assert store.all_ids() == {'standup', 'review', 'late'}
+
+
+def test_meta_round_trip_and_clear():
+    store = EventStore(':memory:')
+    assert store.get_meta('sync_token') is None
+    store.set_meta('sync_token', 'abc')
+    assert store.get_meta('sync_token') == 'abc'
+    store.set_meta('sync_token', None)
+    assert store.get_meta('sync_token', 'none') == 'none'
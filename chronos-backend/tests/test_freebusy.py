@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytz
+
+from freebusy import busy_intervals, free_slots, merge_intervals
+
+TZ = pytz.timezone('America/Los_Angeles')
+
+
+def at(day, hour, minute=0):
+    return int(TZ.localize(datetime(2026, 10, day, hour, minute)).timestamp())
+
+
+def test_merge_intervals_sorts_and_merges_overlapping_and_touching():
+    assert merge_intervals([(5, 7), (1, 3), (2, 4), (7, 9), (11, 12)]) == [(1, 4), (5, 9), (11, 12)]
+    assert merge_intervals([(1, 10), (2, 3)]) == [(1, 10)]
+    assert merge_intervals([]) == []
+
+
+def test_free_slots_within_working_hours():
+    busy = [(at(14, 9), at(14, 10)), (at(14, 9, 30), at(14, 11)), (at(14, 13), at(14, 14))]
+    slots = free_slots(busy, at(14, 0), at(15, 0), day_start_hour=8, day_end_hour=18)
+    assert slots == [(at(14, 8), at(14, 9)), (at(14, 11), at(14, 13)), (at(14, 14), at(14, 18))]
+
+
+def test_free_slots_skip_gaps_shorter_than_the_minimum():
+    busy = [(at(14, 8), at(14, 9)), (at(14, 9, 10), at(14, 18))]
+    assert free_slots(busy, at(14, 0), at(15, 0), min_minutes=15, day_start_hour=8, day_end_hour=18) == []
+
+
+def test_free_slots_span_several_days_and_clip_to_the_range():
+    busy = [(at(14, 7), at(15, 12))]
+    slots = free_slots(busy, at(14, 15), at(16, 0), day_start_hour=8, day_end_hour=18)
+    assert slots == [(at(15, 12), at(15, 18))]
+
+
+def test_busy_intervals_ignore_free_declined_and_cancelled_events():
+    def event(**extra):
+        return dict({'start': {'dateTime': '2026-10-14T10:00:00-07:00'},
+                     'end': {'dateTime': '2026-10-14T11:00:00-07:00'}}, **extra)
+
+    events = [
+        event(),
+        event(transparency='transparent'),
+        event(status='cancelled'),
+        event(attendees=[{'self': True, 'responseStatus': 'declined'}]),
+    ]
+    assert busy_intervals(events) == [(at(14, 10), at(14, 11))]
@@ -0,0 +1,177 @@
+import pytest
+
+import search_engine
+from search_engine import COLLECTION_NAME, DEFAULT_TENANT, SearchEngine
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.upserted = []
+
+    def get(self, include=None):
+        ids = list(self.docs)
+        return {
+            'ids': ids,
+            'documents': [self.docs[i][0] for i in ids],
+            'metadatas': [self.docs[i][1] for i in ids],
+        }
+
+    def upsert(self, documents, metadatas, ids):
+        self.upserted.extend(ids)
+        for doc_id, text, metadata in zip(ids, documents, metadatas):
+            self.docs[doc_id] = (text, metadata)
+
+    def delete(self, ids):
+        for doc_id in ids:
+            self.docs.pop(doc_id, None)
+
+    def query(self, query_embeddings, n_results, where=None):
+        ids = list(self.docs)[:n_results]
+        return {
+            'ids': [ids],
+            'documents': [[self.docs[i][0] for i in ids]],
+            'metadatas': [[self.docs[i][1] for i in ids]],
+            'distances': [[0.5] * len(ids)],
+        }
+
+
+class FakeClient:
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name, embedding_function):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def delete_collection(self, name):
+        del self.collections[name]
+
+
+def event(event_id, summary, updated='1'):
+    return {
+        'id': event_id,
+        'summary': summary,
+        'updated': updated,
+        'start': {'dateTime': '2026-10-20T10:00:00-07:00'},
+        'end': {'dateTime': '2026-10-20T11:00:00-07:00'},
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = SearchEngine()
+    engine.client = FakeClient()
+    engine.embedder = lambda texts: [[0.0, 0.0, 0.0] for _ in texts]
+    engine.status = 'ready'
+    return engine
+
+
+def test_sync_only_upserts_changed_events_and_removes_unseen(engine):
+    stats = engine.update_events_in_chroma([event('a', 'Dentist'), event('b', 'Gym')])
+    assert (stats['added'], stats['updated'], stats['removed']) == (2, 0, 0)
+    collection = engine.client.collections[COLLECTION_NAME]
+    collection.upserted.clear()
+
+    sync = engine.begin_sync()
+    sync.add_events([event('a', 'Dentist')])
+    sync.add_events([event('c', 'Lunch')])
+    stats = sync.finish()
+    assert (stats['added'], stats['updated'], stats['removed']) == (1, 0, 1)
+    assert collection.upserted == ['c']
+    assert set(collection.docs) == {'a', 'c'}
+
+    stats = engine.update_events_in_chroma([event('a', 'Dentist', updated='2'), event('c', 'Lunch')])
+    assert (stats['added'], stats['updated'], stats['removed']) == (0, 1, 0)
+
+
+def test_unchanged_sync_keeps_index_version(engine):
+    version = engine.update_events_in_chroma([event('a', 'Dentist')])['index_version']
+    assert engine.update_events_in_chroma([event('a', 'Dentist')])['index_version'] == version
+
+
+def test_failed_sync_never_deletes(engine):
+    engine.update_events_in_chroma([event('a', 'Dentist'), event('b', 'Gym')])
+    sync = engine.begin_sync()
+    sync.add_events([event('a', 'Dentist')])
+    sync.failed = True
+    with pytest.raises(RuntimeError):
+        sync.finish()
+    assert set(engine.client.collections[COLLECTION_NAME].docs) == {'a', 'b'}
+
+
+def test_tenants_are_isolated(engine):
+    engine.update_events_in_chroma([event('a1', 'Dentist appointment')], tenant_id='alice')
+    engine.update_events_in_chroma([event('b1', 'Dentist checkup')], tenant_id='bob')
+    # Bob's full sync must not remove Alice's documents
+    engine.update_events_in_chroma([event('b2', 'Gym')], tenant_id='bob')
+
+    assert set(engine.client.collections[f'{COLLECTION_NAME}_alice'].docs) == {'a1'}
+    assert set(engine.client.collections[f'{COLLECTION_NAME}_bob'].docs) == {'b2'}
+    assert engine.search_events('dentist', tenant_id='alice')['ids'] == [['a1']]
+    assert 'a1' not in str(engine.search_events('dentist', tenant_id='bob')['ids'])
+
+    assert engine.delete_tenant('alice')
+    assert set(engine.client.collections) == {f'{COLLECTION_NAME}_bob'}
+
+
+def test_default_tenant_keeps_original_collection_name(engine):
+    assert engine.tenant(DEFAULT_TENANT).collection_name == COLLECTION_NAME
+    assert engine.tenant('alice').collection_name == f'{COLLECTION_NAME}_alice'
+
+
+@pytest.mark.parametrize('b_finishes_before_a_reads', [True, False])
+def test_overlapping_syncs_do_not_lose_events(engine, b_finishes_before_a_reads):
+    engine.update_events_in_chroma([event('a', 'Dentist'), event('b', 'Gym')])
+    first = engine.begin_sync()
+    second = engine.begin_sync()
+    if b_finishes_before_a_reads:
+        second.add_events([event('a', 'Dentist')])
+        second.finish()
+        first.add_events([event('a', 'Dentist'), event('b', 'Gym')])
+    else:
+        first.add_events([event('a', 'Dentist'), event('b', 'Gym')])
+        second.add_events([event('a', 'Dentist')])
+        second.finish()
+    stats = first.finish()
+
+    # The sync that finishes last decides what the index holds
+    assert set(engine.client.collections[COLLECTION_NAME].docs) == {'a', 'b'}
+    assert stats['added'] == 1
+    assert engine.search_events('gym')['ids'] == [['b']]
+
+
+def test_incomplete_sync_keeps_unseen_documents(engine):
+    engine.update_events_in_chroma([event('a', 'Dentist'), event('b', 'Gym')])
+    sync = engine.begin_sync()
+    sync.add_events([event('a', 'Dentist'), event('c', 'Lunch')])
+    stats = sync.finish(remove_stale=False)
+    assert stats['removed'] == 0
+    assert set(engine.client.collections[COLLECTION_NAME].docs) == {'a', 'b', 'c'}
+
+
+class RecordingStore:
+    """Stands in for an EventStore; records the range queries it answers."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.queries = []
+
+    def ids_between(self, start_ts, end_ts):
+        self.queries.append((start_ts, end_ts))
+        return self.ids
+
+
+def test_evicted_tenant_gets_its_event_store_back(engine, monkeypatch):
+    monkeypatch.setattr(search_engine, 'SEARCH_MAX_TENANTS', 1)
+    store = RecordingStore(['a1'])
+    engine.event_store_for = {'alice': store}.get
+    engine.update_events_in_chroma([event('a1', 'Dentist')], tenant_id='alice')
+
+    # Bob's tenant pushes Alice's out of memory; her next search rebuilds it
+    engine.tenant('bob')
+    assert 'alice' not in engine._tenants
+    results = engine.search_events('what do I have tomorrow', tenant_id='alice')
+
+    assert engine.tenant('alice').event_store is store
+    assert len(store.queries) == 1
+    assert results['ids'] == [['a1']]
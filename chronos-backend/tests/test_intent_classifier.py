@@ -0,0 +1,94 @@
+import pytest
+
+from intent_classifier import IntentClassifier, INTENT_EXAMPLES, EDIT_OR_DELETE_EXAMPLES
+
+
+@pytest.fixture
+def intent():
+    return IntentClassifier(INTENT_EXAMPLES, ["CREATE", "DELETE", "EDIT", "UNKNOWN"], mode='hybrid', embed=False)
+
+
+@pytest.fixture
+def edit_or_delete():
+    return IntentClassifier(EDIT_OR_DELETE_EXAMPLES, ["EDIT", "DELETE", "UNKNOWN"], mode='hybrid', embed=False)
+
+
+@pytest.mark.parametrize('query', [
+    "remove the location",
+    "clear the description",
+    "remove jennifer",
+    "cancel the zoom link and use teams",
+    "delete the agenda from the description",
+])
+def test_field_edits_are_never_keyword_deletes(edit_or_delete, query):
+    assert edit_or_delete.keyword_intent(query) != 'DELETE'
+
+
+@pytest.mark.parametrize('query', [
+    "remove the location",
+    "clear the description",
+    "remove jennifer",
+    "cancel the zoom link and use teams",
+    "delete the agenda from the description",
+])
+def test_field_edits_defer_to_the_next_stage(edit_or_delete, query):
+    assert edit_or_delete.classify(query) == (None, 'llm')
+
+
+COMPOUND_REQUESTS = [
+    "remove my dinner from friday and add it to saturday",
+    "cancel tomorrow and schedule for friday",
+    "delete this and create a new one on monday",
+    "cancel my dinner and book lunch instead",
+    "cancel the standup and move the retro into its slot",
+]
+
+
+@pytest.mark.parametrize('query', COMPOUND_REQUESTS)
+def test_compound_requests_are_never_keyword_deletes(intent, edit_or_delete, query):
+    # Both agents must defer these to the LLM rather than delete on a keyword
+    assert intent.keyword_intent(query) is None
+    assert edit_or_delete.keyword_intent(query) is None
+    assert edit_or_delete.classify(query) == (None, 'llm')
+
+
+@pytest.mark.parametrize('query', [
+    "cancel this", "delete it", "remove this event", "take this off my calendar",
+    "Clear my calendar for Friday", "Remove tomorrow's dentist appointment", "I can't make it",
+])
+def test_event_level_deletes(edit_or_delete, query):
+    assert edit_or_delete.keyword_intent(query) == 'DELETE'
+
+
+@pytest.mark.parametrize('query', [
+    "move this to 5pm", "remove jennifer from the invite", "push it back an hour", "change the title to planning",
+])
+def test_edits(edit_or_delete, query):
+    assert edit_or_delete.keyword_intent(query) == 'EDIT'
+
+
+@pytest.mark.parametrize('query', [
+    "schedule a project update meeting tomorrow",
+    "book a meeting about the office move",
+    "plan the change review friday",
+])
+def test_leading_create_verb_beats_edit_words_in_the_title(intent, query):
+    assert intent.keyword_intent(query) == 'CREATE'
+
+
+def test_edit_override_beats_create(intent):
+    assert intent.keyword_intent("let's do lunch friday instead of thursday") == 'EDIT'
+
+
+def test_create_and_edit_without_a_leading_verb_is_ambiguous(intent):
+    assert intent.keyword_intent("let's move standup") is None
+
+
+def test_local_mode_answers_unknown_instead_of_deferring():
+    classifier = IntentClassifier(INTENT_EXAMPLES, ["CREATE", "DELETE", "EDIT", "UNKNOWN"], mode='local', embed=False)
+    assert classifier.classify("what is the capital of spain") == ('UNKNOWN', 'neighbour')
+
+
+def test_llm_mode_always_defers():
+    classifier = IntentClassifier(INTENT_EXAMPLES, ["CREATE", "DELETE", "EDIT", "UNKNOWN"], mode='llm', embed=False)
+    assert classifier.classify("cancel my meeting") == (None, 'llm')
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobManager, QueueFull
+
+
+def test_jobs_are_only_visible_to_their_owner():
+    manager = JobManager(workers=1, queue_limit=1)
+    job = manager.submit(lambda job: 'ok', key='alice_lunch', owner='alice')
+    assert manager.get(job.id, owner='alice') is job
+    assert manager.get(job.id, owner='bob') is None
+    assert manager.get(job.id) is None
+
+
+def wait_until_complete(job, timeout=5):
+    version = job.version
+    while not job.complete:
+        new_version = job.wait_for_change(version, timeout)
+        assert new_version != version, 'job did not finish in time'
+        version = new_version
+
+
+def test_submissions_beyond_workers_and_queue_are_rejected():
+    release = threading.Event()
+    manager = JobManager(workers=1, queue_limit=1)
+    first = manager.submit(lambda job: release.wait(5))
+    second = manager.submit(lambda job: release.wait(5))
+    with pytest.raises(QueueFull):
+        manager.submit(lambda job: 'too many')
+    assert manager.stats()['rejected'] == 1
+
+    release.set()
+    wait_until_complete(first)
+    wait_until_complete(second)
+    # Finished jobs no longer count against the limit
+    wait_until_complete(manager.submit(lambda job: 'ok'))
+
+
+def test_duplicate_key_shares_the_in_flight_job_until_released():
+    release = threading.Event()
+    manager = JobManager(workers=1, queue_limit=1)
+    job = manager.submit(lambda job: release.wait(5), key='alice_lunch')
+    assert manager.submit(lambda job: 'dup', key='alice_lunch') is job
+    manager.release('alice_lunch')
+    other = manager.submit(lambda job: 'fresh', key='alice_lunch')
+    assert other is not job
+    release.set()
+    wait_until_complete(job)
+    wait_until_complete(other)
+    assert other.response == 'fresh'
+
+
+def test_failed_jobs_record_the_error():
+    manager = JobManager(workers=1, queue_limit=0)
+    job = manager.submit(lambda job: 1 / 0)
+    wait_until_complete(job)
+    assert job.state == 'failed' and 'division' in job.error
+
+
+def test_finished_jobs_expire_after_ttl():
+    manager = JobManager(workers=1, queue_limit=0, ttl_seconds=0)
+    job = manager.submit(lambda job: 'ok', key='k')
+    wait_until_complete(job)
+    time.sleep(0.01)
+    assert manager.get(job.id) is None
+    assert manager.stats()['jobs'] == 0
+    # The expired job's key no longer deduplicates
+    assert manager.submit(lambda job: 'again', key='k') is not job
+
+
+def test_least_recently_used_finished_jobs_are_evicted_first():
+    manager = JobManager(workers=1, queue_limit=0, max_finished=2)
+    jobs = []
+    for _ in range(2):
+        jobs.append(manager.submit(lambda job: 'ok'))
+        wait_until_complete(jobs[-1])
+    # Reading the oldest job makes it the most recently used
+    assert manager.get(jobs[0].id) is jobs[0]
+    jobs.append(manager.submit(lambda job: 'ok'))
+    wait_until_complete(jobs[-1])
+
+    assert manager.get(jobs[1].id) is None
+    assert manager.get(jobs[0].id) is jobs[0]
+    assert manager.get(jobs[2].id) is jobs[2]
@@ -0,0 +1,43 @@
+from lexical_index import BM25Index, query_terms, reciprocal_rank_fusion
+
+
+def make_index():
+    index = BM25Index()
+    index.add('a', 'Dentist appointment downtown', {'day': 'mon'})
+    index.add('b', 'Team standup', {'day': 'tue'})
+    index.add('c', 'Dentist follow up call with dentist office', {'day': 'wed'})
+    return index
+
+
+def test_query_terms_drop_stopwords_and_duplicates():
+    assert query_terms('When is my dentist meeting with the dentist?') == ['dentist']
+
+
+def test_search_ranks_by_bm25_and_reports_matched_terms():
+    results = make_index().search('dentist call')
+    assert [doc_id for doc_id, _, _ in results] == ['c', 'a']
+    assert results[0][2] == 2 and results[1][2] == 1
+
+
+def test_search_applies_filter_and_limit():
+    index = make_index()
+    assert [r[0] for r in index.search('dentist', doc_filter=lambda m: m['day'] == 'mon')] == ['a']
+    assert len(index.search('dentist', k=1)) == 1
+    assert index.search('the my') == []
+
+
+def test_add_replaces_and_remove_drops_postings():
+    index = make_index()
+    index.add('a', 'Lunch with Sam')
+    assert [r[0] for r in index.search('dentist')] == ['c']
+    index.remove('c')
+    assert index.search('dentist') == []
+    assert len(index) == 2
+    assert index.find(lambda m: True) == [('b', {'day': 'tue'}), ('a', {})]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([['x', 'y', 'z'], ['y', 'z', 'w']])
+    assert fused[:2] == ['y', 'z']
+    assert set(fused) == {'w', 'x', 'y', 'z'}
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,20 @@
+from rules_cache import RulesCache
+
+RULES = '{"rules": [{"activity": "gym", "start_time": "06:00", "end_time": "08:00", "days": [], "blocking": false}]}'
+
+
+def test_parsed_rules_are_cached_and_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'rules.json')
+    cache = RulesCache(path=path, max_size=8)
+    key = RulesCache.key(["Gym  before work"], 'prompt', 'model')
+    assert cache.store(key, RULES, 1.5)
+    # Order, case and spacing of the preferences do not matter
+    assert RulesCache(path=path, max_size=8).lookup(RulesCache.key(["gym before work"], 'prompt', 'model')) == RULES
+
+
+def test_replies_that_do_not_parse_are_not_cached(tmp_path):
+    cache = RulesCache(path=str(tmp_path / 'rules.json'), max_size=8)
+    for reply in ["I couldn't turn those into rules.", '{"rules": [', '{"rules": []}']:
+        key = RulesCache.key([reply], 'prompt', 'model')
+        assert not cache.store(key, reply, 1.0)
+        assert cache.lookup(key) is None
@@ -0,0 +1,36 @@
+from sessions import SessionRegistry, SessionTokens, user_id_for_account
+
+
+def test_tokens_are_random_and_resolve_to_their_user(tmp_path):
+    tokens = SessionTokens(str(tmp_path / 'sessions.json'))
+    user_id = user_id_for_account('alice@example.com')
+    first, second = tokens.issue(user_id), tokens.issue(user_id)
+    assert first != second and user_id not in first
+    assert tokens.resolve(first) == user_id
+    # A user id is not a session token
+    assert tokens.resolve(user_id) is None
+    assert tokens.resolve(None) is None
+
+
+def test_tokens_survive_restart_but_are_not_stored_in_clear(tmp_path):
+    path = tmp_path / 'sessions.json'
+    token = SessionTokens(str(path)).issue('alice')
+    assert token not in path.read_text()
+    assert SessionTokens(str(path)).resolve(token) == 'alice'
+
+
+def test_revoked_token_no_longer_resolves(tmp_path):
+    path = str(tmp_path / 'sessions.json')
+    tokens = SessionTokens(path)
+    token = tokens.issue('alice')
+    tokens.revoke(token)
+    assert tokens.resolve(token) is None
+    assert SessionTokens(path).resolve(token) is None
+
+
+def test_peek_never_builds():
+    registry = SessionRegistry(lambda user_id: f'api for {user_id}')
+    assert registry.peek('alice') is None
+    assert registry.get('alice') == 'api for alice'
+    assert registry.peek('alice') == 'api for alice'
+    assert registry.built == 1
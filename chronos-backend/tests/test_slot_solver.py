@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from slot_solver import solve, extract_duration_minutes, parse_rules, rule_match
+
+TZ = pytz.timezone('America/Los_Angeles')
+# A Wednesday morning
+NOW = TZ.localize(datetime(2026, 10, 14, 9, 30))
+
+# What PreferencesAgent makes of the sample preferences in groq_engine.py
+RULES = {'rules': [
+    {'activity': 'work_calls', 'start_time': '06:00', 'end_time': '16:00',
+     'days': ['monday', 'tuesday', 'wednesday', 'thursday', 'friday'], 'blocking': True},
+    {'activity': 'socialize', 'start_time': '17:00', 'end_time': '00:00', 'days': [], 'blocking': False},
+    {'activity': 'party', 'start_time': '17:00', 'end_time': '00:00', 'days': ['wednesday'], 'blocking': True},
+]}
+
+
+def local(ts):
+    return datetime.fromtimestamp(ts, TZ)
+
+
+def at(day, hour, minute=0):
+    return int(TZ.localize(datetime(2026, 10, day, hour, minute)).timestamp())
+
+
+def test_family_blocking_rule_is_still_a_block():
+    _, _, slots = solve("drink with connor on wednesday", RULES, [], now=NOW)
+    assert slots
+    for start, end in slots:
+        # The party blocks Wednesday from 17:00 even though drinks are only in the same family
+        assert at(14, 9, 30) <= start and end <= at(14, 17)
+
+
+def test_exact_blocking_rule_restricts_the_activity():
+    _, _, slots = solve("work call with the client tomorrow", RULES, [], now=NOW)
+    assert slots
+    for start, end in slots:
+        # The rule's hours narrow the working day rather than replacing it
+        assert at(15, 7) <= start and end <= at(15, 16)
+
+
+def test_exact_blocking_rule_never_widens_the_working_day():
+    solver, _, _ = solve("work call with the client tomorrow", RULES, [], now=NOW)
+    assert not solver.is_allowed("work call", at(15, 6), at(15, 7))
+    assert solver.is_allowed("work call", at(15, 7), at(15, 8))
+
+
+# What PreferencesAgent makes of the sample preference "No meetings on Fridays"
+NO_FRIDAY_MEETINGS = {'rules': [
+    {'activity': 'no_meetings', 'days': ['friday'], 'start_time': '00:00', 'end_time': '23:59', 'blocking': True},
+]}
+
+
+def test_negated_rule_blocks_its_activity_in_the_window():
+    solver, _, slots = solve("meeting with bob", NO_FRIDAY_MEETINGS, [], now=NOW)
+    assert slots
+    assert not solver.is_allowed("meeting with bob", at(16, 10), at(16, 11))
+    assert solver.is_allowed("meeting with bob", at(15, 10), at(15, 11))
+    assert solve("meeting with bob on friday", NO_FRIDAY_MEETINGS, [], now=NOW)[2] == []
+
+
+def test_negated_rule_leaves_other_days_and_activities_alone():
+    _, _, slots = solve("team meeting tomorrow", NO_FRIDAY_MEETINGS, [], now=NOW)
+    assert slots
+    assert all(local(start).strftime('%A') == 'Thursday' and local(start).hour >= 7 for start, _ in slots)
+
+    _, _, slots = solve("gym on friday", NO_FRIDAY_MEETINGS, [], now=NOW)
+    assert slots
+    assert all(local(start).strftime('%A') == 'Friday' for start, _ in slots)
+
+
+def test_preference_rule_ranks_matching_slots_first():
+    _, _, slots = solve("coffee with sam tomorrow", RULES, [], now=NOW)
+    assert local(slots[0][0]).strftime('%a %H:%M') == 'Thu 17:00'
+
+
+def test_slots_avoid_busy_time_and_do_not_overlap():
+    busy = [(at(15, 7), at(15, 12))]
+    _, duration, slots = solve("dentist tomorrow for 30 minutes", {'rules': []}, busy, now=NOW)
+    assert duration == 30
+    assert len(slots) == 3
+    for start, end in slots:
+        assert start >= at(15, 12)
+        assert end - start == 30 * 60
+    starts = sorted(start for start, _ in slots)
+    assert all(later - earlier >= 30 * 60 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_full_window_falls_back_to_the_rest_of_the_day():
+    busy = [(at(15, 5), at(15, 12))]
+    _, _, slots = solve("coffee tomorrow morning", {'rules': []}, busy, now=NOW)
+    assert slots
+    assert all(local(start).date() == local(at(15, 12)).date() and start >= at(15, 12) for start, _ in slots)
+
+
+def test_title_starting_like_a_month_keeps_its_weekday():
+    _, _, slots = solve("junior 1:1 on friday", {'rules': []}, [], now=NOW)
+    assert slots
+    assert all(local(start).strftime('%A') == 'Friday' for start, _ in slots)
+
+
+@pytest.mark.parametrize('text, minutes', [
+    ("lunch for 30 minutes", 30), ("call for half an hour", 30), ("study for 2 hours", 120),
+    ("gym for an hour and a half", 90), ("dinner", 60),
+])
+def test_extract_duration_minutes(text, minutes):
+    assert extract_duration_minutes(text) == minutes
+
+
+def test_parse_rules_accepts_prose_wrapped_json():
+    assert parse_rules('Here you go:\n```json\n{"rules": [{"activity": "gym"}]}\n```') == [{'activity': 'gym'}]
+    assert parse_rules('I could not find any rules.') == []
+
+
+def test_rule_match():
+    assert rule_match({'activity': 'work_calls'}, "call with the client") == 'exact'
+    assert rule_match({'activity': 'party'}, "drinks with connor") == 'family'
+    assert rule_match({'activity': 'gym'}, "dentist appointment") is None
+    assert rule_match({'activity': 'no_meetings'}, "meeting with bob") == 'exact'
+    assert rule_match({'activity': 'avoid calls'}, "coffee with sam") is None
+    assert rule_match({'activity': 'no events'}, "coffee with sam") == 'exact'
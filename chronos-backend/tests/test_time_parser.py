@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+import pytz
+
+from time_parser import extract_time_window
+
+TZ = pytz.timezone('America/Los_Angeles')
+# A Wednesday
+NOW = TZ.localize(datetime(2026, 10, 14, 9, 30))
+
+
+def window_dates(text):
+    window = extract_time_window(text, now=NOW)
+    if window is None:
+        return None
+    return window.start.strftime('%Y-%m-%d %H:%M'), window.end.strftime('%Y-%m-%d %H:%M')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("what do I have tomorrow", ('2026-10-15 00:00', '2026-10-16 00:00')),
+    ("dinner tonight", ('2026-10-14 17:00', '2026-10-15 00:00')),
+    # "next <weekday>" is the coming one; only "next wednesday" on a Wednesday skips a week
+    ("next friday", ('2026-10-16 00:00', '2026-10-17 00:00')),
+    ("next wednesday", ('2026-10-21 00:00', '2026-10-22 00:00')),
+    ("on friday", ('2026-10-16 00:00', '2026-10-17 00:00')),
+    ("tomorrow morning", ('2026-10-15 05:00', '2026-10-15 12:00')),
+    ("this week", ('2026-10-12 00:00', '2026-10-19 00:00')),
+    ("march 5", ('2027-03-05 00:00', '2027-03-06 00:00')),
+    ("jan. 3rd", ('2027-01-03 00:00', '2027-01-04 00:00')),
+    ("the 5th of september", ('2027-09-05 00:00', '2027-09-06 00:00')),
+    ("sept 20", ('2027-09-20 00:00', '2027-09-21 00:00')),
+    ("12/25", ('2026-12-25 00:00', '2026-12-26 00:00')),
+    ("2026-11-02", ('2026-11-02 00:00', '2026-11-03 00:00')),
+    ("in 3 days", ('2026-10-17 00:00', '2026-10-18 00:00')),
+])
+def test_date_phrases(text, expected):
+    assert window_dates(text) == expected
+
+
+def test_remainder_drops_the_date_phrase():
+    assert extract_time_window("lunch with sam tomorrow afternoon", now=NOW).remainder == 'lunch with sam'
+
+
+@pytest.mark.parametrize('text', ["marketing 2 review", "octopus 3 times", "decide 4 options", "what is the weather"])
+def test_words_starting_like_a_month_are_not_dates(text):
+    assert extract_time_window(text, now=NOW) is None
+
+
+def test_month_prefix_word_does_not_hide_the_weekday():
+    # Used to resolve to June 1 via "junior 1"
+    assert window_dates("junior 1:1 on friday") == ('2026-10-16 00:00', '2026-10-17 00:00')
+
+
+@pytest.mark.parametrize('text', ["team sync 1/2 hour", "call for 1/2 hr", "a 3/4 h walk"])
+def test_fractions_of_an_hour_are_not_dates(text):
+    assert extract_time_window(text, now=NOW) is None
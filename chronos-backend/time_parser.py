@@ -0,0 +1,188 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+import pytz
+import re
+
+DEFAULT_TIMEZONE = 'America/Los_Angeles'
+
+# start/end are timezone-aware datetimes (end exclusive); remainder is the query with the time phrase removed
+TimeWindow = namedtuple('TimeWindow', ['start', 'end', 'remainder'])
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+          'september', 'october', 'november', 'december']
+
+_WEEKDAY_PATTERN = r'(mon|tue|tues|wed|thu|thur|thurs|fri|sat|sun)(?:day|nesday|rsday|urday)?'
+# Whole month names or their abbreviations only, so "junior" or "marketing" never read as a month
+_MONTH_PATTERN = (r'(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+                  r'|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?')
+# "1/2 hour" is a duration, not January 2nd
+_DURATION_UNIT = r'(?!\s*(?:hours?|hrs?|h|minutes?|mins?)\b)'
+
+PART_OF_DAY = {
+    'morning': (5, 12),
+    'afternoon': (12, 17),
+    'evening': (17, 24),
+    'tonight': (17, 24),
+    'night': (17, 24),
+}
+
+_PATTERNS = [
+    ('relative_day', re.compile(r'\b(today|tonight|tomorrow|tmrw|yesterday)\b')),
+    ('weekend', re.compile(r'\b(this|next|last)?\s*weekend\b')),
+    ('week', re.compile(r'\b(this|next|last)\s+week\b')),
+    ('month', re.compile(r'\b(this|next|last)\s+month\b')),
+    ('in_days', re.compile(r'\bin\s+(\d{1,2})\s+days?\b')),
+    ('iso_date', re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')),
+    ('slash_date', re.compile(r'\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b' + _DURATION_UNIT)),
+    ('month_day', re.compile(r'\b' + _MONTH_PATTERN + r'\s+(\d{1,2})(?:st|nd|rd|th)?\b')),
+    ('day_month', re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?' + _MONTH_PATTERN + r'(?=\s|$|[,?!])')),
+    ('weekday', re.compile(r'\b(?:(this|next|last|on)\s+)?' + _WEEKDAY_PATTERN + r'\b')),
+]
+
+_PART_OF_DAY_RE = re.compile(r'\b(?:in the\s+|this\s+)?(morning|afternoon|evening|night)\b')
+
+
+def _day_start(dt):
+    return dt.tzinfo.localize(datetime(dt.year, dt.month, dt.day))
+
+def _day_range(tz, day, days=1):
+    start = tz.localize(datetime(day.year, day.month, day.day))
+    end = tz.localize(datetime.combine(day + timedelta(days=days), datetime.min.time()))
+    return start, end
+
+def _month_index(token):
+    token = token.lower().rstrip('.')
+    for i, name in enumerate(MONTHS):
+        if name.startswith(token[:3]):
+            return i + 1
+    return None
+
+def _weekday_index(token):
+    token = token.lower()
+    for i, name in enumerate(WEEKDAYS):
+        if name.startswith(token[:3]):
+            return i
+    return None
+
+def _nearest_date(today, month, day, year=None):
+    """Resolves a month/day without a year to the next occurrence (today counts)."""
+    if year is not None:
+        return datetime(year, month, day).date()
+    candidate = datetime(today.year, month, day).date()
+    if candidate < today:
+        candidate = datetime(today.year + 1, month, day).date()
+    return candidate
+
+
+def _resolve(kind, match, now):
+    tz = now.tzinfo
+    today = now.date()
+
+    if kind == 'relative_day':
+        word = match.group(1)
+        offset = {'today': 0, 'tonight': 0, 'tomorrow': 1, 'tmrw': 1, 'yesterday': -1}[word]
+        start, end = _day_range(tz, today + timedelta(days=offset))
+        if word == 'tonight':
+            start = start + timedelta(hours=PART_OF_DAY['tonight'][0])
+        return start, end
+
+    if kind == 'weekend':
+        qualifier = match.group(1)
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+        if today.weekday() == 6:
+            saturday = today - timedelta(days=1)
+        if qualifier == 'next':
+            saturday += timedelta(days=7)
+        elif qualifier == 'last':
+            saturday -= timedelta(days=7)
+        return _day_range(tz, saturday, days=2)
+
+    if kind == 'week':
+        qualifier = match.group(1)
+        monday = today - timedelta(days=today.weekday())
+        if qualifier == 'next':
+            monday += timedelta(days=7)
+        elif qualifier == 'last':
+            monday -= timedelta(days=7)
+        return _day_range(tz, monday, days=7)
+
+    if kind == 'month':
+        qualifier = match.group(1)
+        year, month = today.year, today.month
+        if qualifier == 'next':
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        elif qualifier == 'last':
+            year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        first = datetime(year, month, 1).date()
+        next_first = datetime(year + 1, 1, 1).date() if month == 12 else datetime(year, month + 1, 1).date()
+        return _day_range(tz, first, days=(next_first - first).days)
+
+    if kind == 'in_days':
+        return _day_range(tz, today + timedelta(days=int(match.group(1))))
+
+    if kind == 'iso_date':
+        year, month, day = (int(group) for group in match.groups())
+        return _day_range(tz, datetime(year, month, day).date())
+
+    if kind == 'slash_date':
+        month, day, year = match.groups()
+        if year is not None:
+            year = int(year)
+            if year < 100:
+                year += 2000
+        return _day_range(tz, _nearest_date(today, int(month), int(day), year))
+
+    if kind == 'month_day':
+        return _day_range(tz, _nearest_date(today, _month_index(match.group(1)), int(match.group(2))))
+
+    if kind == 'day_month':
+        return _day_range(tz, _nearest_date(today, _month_index(match.group(2)), int(match.group(1))))
+
+    if kind == 'weekday':
+        qualifier, token = match.group(1), match.group(2)
+        target = _weekday_index(token)
+        days_ahead = (target - today.weekday()) % 7
+        if qualifier == 'next' and days_ahead == 0:
+            days_ahead = 7
+        elif qualifier == 'last':
+            days_ahead = days_ahead - 7 if days_ahead else -7
+        return _day_range(tz, today + timedelta(days=days_ahead))
+
+    return None
+
+
+def extract_time_window(text, now=None, timezone=DEFAULT_TIMEZONE):
+    """
+    Finds the first date expression in text ("tomorrow", "next tuesday", "march 5", "this week",
+    optionally narrowed by "morning"/"afternoon"/"evening") and returns a TimeWindow, or None
+    when the text has no recognizable date.
+    """
+    tz = pytz.timezone(timezone)
+    now = now.astimezone(tz) if now is not None else datetime.now(tz)
+    lowered = text.lower()
+
+    for kind, pattern in _PATTERNS:
+        match = pattern.search(lowered)
+        if not match:
+            continue
+        try:
+            window = _resolve(kind, match, now)
+        except (ValueError, TypeError):
+            continue
+        if window is None:
+            continue
+        start, end = window
+        remainder = lowered[:match.start()] + ' ' + lowered[match.end():]
+
+        part = _PART_OF_DAY_RE.search(remainder)
+        if part and end - start <= timedelta(days=1):
+            day = _day_start(start)
+            first_hour, last_hour = PART_OF_DAY[part.group(1)]
+            start = max(start, day + timedelta(hours=first_hour))
+            end = min(end, day + timedelta(hours=last_hour))
+            remainder = remainder[:part.start()] + ' ' + remainder[part.end():]
+
+        return TimeWindow(start, end, ' '.join(remainder.split()))
+
+    return None
@@ -57,6 +57,28 @@ const ChatInterface = ({ welcomeMessage, onSubmit, onEventsUpdate }) => {
         const messageToSend = newMessage;
         setNewMessage('');
 
+        const showError = (error) => {
+            console.error('Error:', error);
+            // Handle different types of errors
+            let errorMessage = "Sorry, I encountered an error while processing your request. Please try again.";
+
+            if (error.message && error.message.includes("Invalid JSON response from LLM")) {
+                errorMessage = "I had trouble understanding how to schedule these events. Could you rephrase your request?";
+            } else if (error.response && error.response.data && error.response.data.message) {
+                errorMessage = `Error: ${error.response.data.message}`;
+            }
+
+            // Replace loading message with error
+            setMessages(prev => [
+                ...prev.slice(0, -1),
+                {
+                    id: prev.length,
+                    text: errorMessage,
+                    isUser: false
+                }
+            ]);
+        };
+
         try {
             // Add initial processing message
             const processingMessageId = messages.length + 2;
@@ -67,27 +89,8 @@ const ChatInterface = ({ welcomeMessage, onSubmit, onEventsUpdate }) => {
                 isProcessing: true
             }]);
 
-            // Use polling instead of EventSource
-            const pollStatus = async () => {
-                const response = await fetch(`http://127.0.0.1:5000/api/schedule/status`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    credentials: 'include',
-                    body: JSON.stringify({
-                        query: messageToSend,
-                        preferences: []
-                    })
-                });
-
-                if (!response.ok) {
-                    throw new Error('Network response was not ok');
-                }
-
-                const data = await response.json();
-
-                // Update message with current stage
+            // Update message with current stage
+            const showStatus = (data) => {
                 setMessages(prev => [
                     ...prev.slice(0, -1),
                     {
@@ -98,56 +101,102 @@ const ChatInterface = ({ welcomeMessage, onSubmit, onEventsUpdate }) => {
                         stage: data.stage
                     }
                 ]);
+            };
 
-                // If not complete, poll again
-                if (!data.complete) {
-                    setTimeout(pollStatus, 1000);
-                } else {
-                    // Final response received
-                    const responseMessage = formatEventResponse(data.response);
-                    setMessages(prev => [
-                        ...prev.slice(0, -1),
-                        {
-                            id: processingMessageId,
-                            text: responseMessage,
-                            isUser: false
-                        }
-                    ]);
-
-                    // Fetch updated events after successful event creation
-                    const eventsResponse = await fetch('http://127.0.0.1:5000/api/events', {
-                        credentials: 'include'
-                    });
-                    if (eventsResponse.ok) {
-                        const eventsData = await eventsResponse.json();
-                        onEventsUpdate(eventsData.events);
+            const finish = async (data) => {
+                // Final response received
+                const responseMessage = formatEventResponse(data.response);
+                setMessages(prev => [
+                    ...prev.slice(0, -1),
+                    {
+                        id: processingMessageId,
+                        text: responseMessage,
+                        isUser: false
                     }
+                ]);
+
+                // Fetch updated events after successful event creation
+                const eventsResponse = await fetch('http://127.0.0.1:5000/api/events', {
+                    credentials: 'include'
+                });
+                if (eventsResponse.ok) {
+                    const eventsData = await eventsResponse.json();
+                    onEventsUpdate(eventsData.events);
                 }
             };
 
-            // Start polling
-            await pollStatus();
+            // The job is followed by id from here on, so a retry never submits the query a second time
+            let finished = false;
+            const complete = async (data) => {
+                if (finished) return;
+                finished = true;
+                await finish(data);
+            };
 
-        } catch (error) {
-            console.error('Error:', error);
-            // Handle different types of errors
-            let errorMessage = "Sorry, I encountered an error while processing your request. Please try again.";
+            // Polling fallback for browsers or proxies without Server-Sent Events
+            const pollJob = async (jobId) => {
+                if (finished) return;
+                const response = await fetch(`http://127.0.0.1:5000/api/schedule/jobs/${jobId}`, {
+                    credentials: 'include'
+                });
 
-            if (error.message && error.message.includes("Invalid JSON response from LLM")) {
-                errorMessage = "I had trouble understanding how to schedule these events. Could you rephrase your request?";
-            } else if (error.response && error.response.data && error.response.data.message) {
-                errorMessage = `Error: ${error.response.data.message}`;
-            }
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
 
-            // Replace loading message with error
-            setMessages(prev => [
-                ...prev.slice(0, -1),
-                {
-                    id: prev.length,
-                    text: errorMessage,
-                    isUser: false
+                const data = await response.json();
+                if (data.complete) {
+                    await complete(data);
+                } else {
+                    showStatus(data);
+                    setTimeout(() => pollJob(jobId).catch(showError), 1000);
                 }
-            ]);
+            };
+
+            // Start the job; after that the server pushes each stage change
+            const response = await fetch(`http://127.0.0.1:5000/api/schedule/jobs`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                credentials: 'include',
+                body: JSON.stringify({
+                    query: messageToSend,
+                    preferences: []
+                })
+            });
+
+            if (!response.ok) {
+                throw new Error('Network response was not ok');
+            }
+
+            const job = await response.json();
+            showStatus(job);
+            if (job.complete) {
+                await complete(job);
+            } else if (!window.EventSource) {
+                setTimeout(() => pollJob(job.job_id).catch(showError), 1000);
+            } else {
+                const source = new EventSource(
+                    `http://127.0.0.1:5000/api/schedule/jobs/${job.job_id}/events`,
+                    { withCredentials: true }
+                );
+                source.addEventListener('status', (event) => {
+                    showStatus(JSON.parse(event.data));
+                });
+                source.addEventListener('done', (event) => {
+                    source.close();
+                    complete(JSON.parse(event.data)).catch(showError);
+                });
+                source.onerror = () => {
+                    // Stream failed or was cut off: keep following the same job by polling
+                    source.close();
+                    pollJob(job.job_id).catch(showError);
+                };
+            }
+
+        } catch (error) {
+            showError(error);
         }
     };
 